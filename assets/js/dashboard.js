@@ -11,13 +11,20 @@
   function pickColumns(arr){ const cols=new Set(); for(let i=0;i<Math.min(arr.length,10);i++){ const row=arr[i]; if(isPlainObject(row)) Object.keys(row).forEach(k=>cols.add(k)); } return Array.from(cols).slice(0,MAX_COLS); }
   function renderKV(obj){ const dl=['<dl class="row mb-0 kv">']; Object.keys(obj).forEach(k=>{ const val=obj[k]; const display=isPlainObject(val)||Array.isArray(val)?JSON.stringify(val):val; dl.push(`<dt class="col-sm-5">${esc(k)}</dt><dd class="col-sm-7">${esc(truncate(display))}</dd>`); }); dl.push('</dl>'); return dl.join(''); }
   function renderTable(arr){ if(!Array.isArray(arr)||arr.length===0) return '<div class="text-muted">No data</div>'; const cols=pickColumns(arr); const out=[]; out.push('<div class="table-responsive"><table class="table table-sm table-striped align-middle"><thead><tr>'); cols.forEach(c=>out.push(`<th>${esc(c)}</th>`)); out.push('</tr></thead><tbody>'); for(let i=0;i<Math.min(arr.length,MAX_ROWS);i++){ const row=arr[i]; out.push('<tr>'); cols.forEach(c=>{ const v=row&&typeof row==='object'?row[c]:''; out.push(`<td class="kv">${esc(truncate(v))}</td>`); }); out.push('</tr>'); } out.push('</tbody></table></div>'); if(arr.length>MAX_ROWS) out.push(`<div class="text-muted small">Showing first ${MAX_ROWS} of ${arr.length} rows</div>`); return out.join(''); }
-  async function load(el){ const url=el.getAttribute('data-endpoint'); if(!url) return; el.innerHTML='<div class="text-muted">Loading…</div>'; try { const res=await fetch(url,{ headers:{'Accept':'application/json'}, cache:'no-store' }); const text=await res.text(); let data; try{ data=JSON.parse(text); }catch(e){ data=null; } if(!res.ok) throw new Error(`HTTP ${res.status}`); if(data==null){ el.innerHTML=`<pre class="kv">${esc(text)}</pre>`; return; } if(Array.isArray(data)){ el.innerHTML=renderTable(data); } else if(isPlainObject(data)){ if(Array.isArray(data.items)) el.innerHTML=renderTable(data.items); else el.innerHTML=renderKV(data); } else { el.innerHTML=`<pre class="kv">${esc(String(data))}</pre>`; } } catch(err){ el.innerHTML=`<div class="alert alert-danger mb-0">Failed to load: ${esc(err.message||err)}</div>`; } }
+  function hash32(s){ let h=0x811c9dc5; for(let i=0;i<s.length;i++){ h^=s.charCodeAt(i); h=Math.imul(h,0x01000193); } return h>>>0; }
+  // Skip DOM writes when an auto-refresh renders exactly what is already on screen
+  function paint(el, html){ const h=hash32(html); if(el._renderHash===h) return; el._renderHash=h; el.innerHTML=html; }
+  async function load(el){ const url=el.getAttribute('data-endpoint'); if(!url) return; if(el._renderHash===undefined) el.innerHTML='<div class="text-muted">Loading…</div>'; try { const res=await fetch(url,{ headers:{'Accept':'application/json'}, cache:'no-store' }); const text=await res.text(); let data; try{ data=JSON.parse(text); }catch(e){ data=null; } if(!res.ok) throw new Error(`HTTP ${res.status}`); if(data==null){ paint(el, `<pre class="kv">${esc(text)}</pre>`); return; } if(Array.isArray(data)){ paint(el, renderTable(data)); } else if(isPlainObject(data)){ if(Array.isArray(data.items)) paint(el, renderTable(data.items)); else paint(el, renderKV(data)); } else { paint(el, `<pre class="kv">${esc(String(data))}</pre>`); } } catch(err){ paint(el, `<div class="alert alert-danger mb-0">Failed to load: ${esc(err.message||err)}</div>`); } }
   function init(){ const targets=document.querySelectorAll('[data-endpoint]'); targets.forEach(load); document.querySelectorAll('[data-refresh]').forEach(btn=>{ btn.addEventListener('click', ()=>{ const sel=btn.getAttribute('data-refresh'); const el=sel?document.querySelector(sel):null; if(el) load(el); }); }); const refreshS=Number(document.body.getAttribute('data-autorefresh'))||0; if(refreshS>0) setInterval(()=>targets.forEach(load), refreshS*1000); document.querySelectorAll('[data-cmd]').forEach(btn=>{ btn.addEventListener('click', ()=>{ const cmd=btn.getAttribute('data-cmd'); navigator.clipboard.writeText(cmd).then(()=>{ btn.textContent='Copied'; setTimeout(()=>btn.textContent='Copy',1200); }); }); }); }
   document.addEventListener('DOMContentLoaded', init);
 })();
 
 // Lightweight sparkline renderer (no deps)
 (function(){
+  // Table-driven escaper: one regex pass per value, no DOM node per call
+  const ESC_MAP={'&':'&amp;','<':'&lt;','>':'&gt;','"':'&quot;',"'":'&#39;'};
+  function esc(s){ return String(s ?? '').replace(/[&<>"']/g, c=>ESC_MAP[c]); }
+  const kvRow=(k,v)=>`<tr><th>${esc(k)}</th><td class="mono">${esc(v)}</td></tr>`;
   function drawSpark(el){
     const dataAttr=el.getAttribute('data-points'); if(!dataAttr) return;
     const pts=dataAttr.split(',').map(v=>Number(v)||0); if(!pts.length) return;
@@ -59,14 +66,14 @@
           if(job){
             parts.push('<h6>Job</h6>');
             parts.push('<div class="table-responsive"><table class="table table-sm mb-3"><tbody>');
-            Object.keys(job).forEach(k=>{ parts.push(`<tr><th>${k}</th><td class="mono">${String(job[k] ?? '')}</td></tr>`); });
+            Object.keys(job).forEach(k=>{ parts.push(kvRow(k, job[k])); });
             parts.push('</tbody></table></div>');
           }
           parts.push('<h6>Logs (last 50)</h6>');
           if(logs.length===0){ parts.push('<div class="text-muted">No logs</div>'); }
           else {
             parts.push('<div class="table-responsive"><table class="table table-sm"><thead><tr><th>Time</th><th>Level</th><th>Message</th></tr></thead><tbody>');
-            logs.forEach(r=>{ const ts=r.created_at||''; const lv=r.level||''; const msg=(r.message||''); parts.push(`<tr><td class="mono">${ts}</td><td>${lv||''}</td><td class="mono">${msg.length>300?msg.slice(0,297)+'…':msg}</td></tr>`); });
+            logs.forEach(r=>{ const msg=String(r.message||''); parts.push(`<tr><td class="mono">${esc(r.created_at)}</td><td>${esc(r.level)}</td><td class="mono">${esc(msg.length>300?msg.slice(0,297)+'…':msg)}</td></tr>`); });
             parts.push('</tbody></table></div>');
           }
           body.innerHTML = parts.join('');
@@ -108,7 +115,7 @@
           const parts=[];
           parts.push('<h6>Event</h6>');
           parts.push('<div class="table-responsive"><table class="table table-sm mb-3"><tbody>');
-          ['id','webhook_id','webhook_type','status','received_at','processed_at','error_message','source_ip','user_agent'].forEach(k=>{ const v=wh[k]??''; parts.push(`<tr><th>${k}</th><td class="mono">${String(v)}</td></tr>`); });
+          ['id','webhook_id','webhook_type','status','received_at','processed_at','error_message','source_ip','user_agent'].forEach(k=>{ parts.push(kvRow(k, wh[k])); });
           parts.push('</tbody></table></div>');
           parts.push('<h6>Payload</h6>');
           parts.push(`<pre class="kv">${esc(redact(wh.payload||''))}</pre>`);
@@ -32,19 +32,13 @@
         <div class="text-muted small mt-1">from ${first || '—'} to ${last || '—'}</div>
       `;
 
-      // Rows
-      const frag = document.createDocumentFragment();
-      events.forEach(e => {
-        const tr = document.createElement('tr');
-        tr.innerHTML = `
+      // Rows: build one markup string and parse it once, rather than one innerHTML parse per event
+      table.innerHTML = events.map(e => `<tr>
           <td class="mono">${(e.time || '').replace('T',' ').replace('Z','')}</td>
           <td class="mono">${e.stage || ''}</td>
           <td class="mono" style="white-space:pre-wrap;">${(e.message || '').toString().slice(0,400)}</td>
           <td class="mono">${e.source || ''}</td>
-        `;
-        frag.appendChild(tr);
-      });
-      table.innerHTML = ''; table.appendChild(frag);
+        </tr>`).join('');
 
       // Sparkline (events per slice)
       if (spark && spark.getContext) {
@@ -3,9 +3,11 @@
 # - Ensures single instance via flock
 # - Short runtime per invocation (respects vend_queue_runtime_business)
 # - Logs to assets/services/queue/logs/worker.log
+# - Runs the worker with OPcache's optimizer on (CLI default is off); override via PHP_BIN / PHP_OPTS
 
 APP_ROOT="/home/master/applications/jcepnzzkmj/public_html/assets/services/queue"
-PHP_BIN="php"
+PHP_BIN="${PHP_BIN:-php}"
+PHP_OPTS="${PHP_OPTS:--d opcache.enable_cli=1}"
 LOCK_FILE="$APP_ROOT/logs/worker.lock"
 LOG_FILE="$APP_ROOT/logs/worker.log"
 RUNNER="$APP_ROOT/bin/run-jobs.php"
@@ -15,7 +17,7 @@ mkdir -p "$APP_ROOT/logs"
 
 # Acquire non-blocking lock (exit quietly if already running)
 if command -v flock >/dev/null 2>&1; then
-  exec flock -n "$LOCK_FILE" $PHP_BIN "$RUNNER" --continuous --limit=500 >> "$LOG_FILE" 2>&1
+  exec flock -n "$LOCK_FILE" $PHP_BIN $PHP_OPTS "$RUNNER" --continuous --limit=500 >> "$LOG_FILE" 2>&1
 else
   # Fallback without flock: check a PID file
   PIDFILE="$APP_ROOT/logs/worker.pid"
@@ -23,6 +25,12 @@ else
     exit 0
   fi
   echo $$ > "$PIDFILE"
-  trap 'rm -f "$PIDFILE"' EXIT INT TERM
-  $PHP_BIN "$RUNNER" --continuous --limit=500 >> "$LOG_FILE" 2>&1
+  trap 'rm -f "$PIDFILE"' EXIT
+  # Run the worker in the background so a TERM/INT sent to this wrapper is forwarded to it
+  # (its own handler finishes the current job and releases the rest of the batch) instead of
+  # being deferred until the worker exits on its own.
+  $PHP_BIN $PHP_OPTS "$RUNNER" --continuous --limit=500 >> "$LOG_FILE" 2>&1 &
+  CHILD=$!
+  trap 'kill -TERM "$CHILD" 2>/dev/null' INT TERM
+  while kill -0 "$CHILD" 2>/dev/null; do wait "$CHILD"; done
 fi
@@ -8,13 +8,16 @@ require_once __DIR__ . '/../src/Logger.php';
 require_once __DIR__ . '/../src/WorkItem.php';
 require_once __DIR__ . '/../src/PdoWorkItemRepository.php';
 require_once __DIR__ . '/../src/Http.php';
-require_once __DIR__ . '/../src/Lightspeed/OAuthClient.php';
-require_once __DIR__ . '/../src/Lightspeed/HttpClient.php';
-require_once __DIR__ . '/../src/Lightspeed/InventoryV20.php';
-require_once __DIR__ . '/../src/Lightspeed/ProductsV21.php';
-require_once __DIR__ . '/../src/Lightspeed/ConsignmentsV20.php';
 require_once __DIR__ . '/../src/Lightspeed/Runner.php';
 
+// Vendor API clients (OAuth/HTTP/Inventory/Products/Consignments) and Degrade are loaded on first use:
+// a drained or paused queue exits without compiling them.
+spl_autoload_register(static function (string $class): void {
+    if (strncmp($class, 'Queue\\', 6) !== 0) { return; }
+    $file = __DIR__ . '/../src/' . str_replace('\\', '/', substr($class, 6)) . '.php';
+    if (is_file($file)) { require_once $file; }
+});
+
 function parse_args(array $argv): array {
     $out = [];
     foreach ($argv as $a) {
@@ -0,0 +1,19 @@
+-- Migration: Composite index for oldest-pending lookups on ls_jobs
+-- Date: 2026-10-16
+--
+-- Health, metrics, health.grade and Degrade::autoEvaluate all run
+--   SELECT MIN(created_at) FROM ls_jobs WHERE status='pending'
+-- Without (status, created_at) that scans every pending row; with it the
+-- optimizer resolves MIN() with a single index dive.
+-- Re-runnable: only creates the index when it is missing.
+
+SET @idx_exists := (
+  SELECT COUNT(1) FROM information_schema.STATISTICS
+  WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'ls_jobs' AND INDEX_NAME = 'idx_jobs_status_created'
+);
+SET @ddl := IF(@idx_exists = 0,
+  'ALTER TABLE ls_jobs ADD KEY idx_jobs_status_created (status, created_at)',
+  'SELECT 1');
+PREPARE stmt FROM @ddl;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
@@ -11,6 +11,28 @@ use RuntimeException;
  */
 final class HttpClient
 {
+    /** @var \CurlHandle|resource|null shared handle; keeps the connection to the API host alive */
+    private static $ch = null;
+
+    /**
+     * Reused curl handle (reset between requests) so consecutive calls skip the TCP+TLS handshake.
+     * @return \CurlHandle|resource
+     */
+    private static function handle()
+    {
+        if (self::$ch === null) {
+            $ch = curl_init();
+            if ($ch === false) {
+                throw new RuntimeException('curl_init failed');
+            }
+            self::$ch = $ch;
+        } else {
+            curl_reset(self::$ch);
+        }
+        curl_setopt(self::$ch, CURLOPT_TCP_KEEPALIVE, 1);
+        return self::$ch;
+    }
+
     /**
      * @param string $method
      * @param string $pathOrUrl e.g. "/api/2.0/inventory" or full URL
@@ -32,15 +54,13 @@ final class HttpClient
             'Accept' => 'application/json',
         ], $headers);
 
-        $ch = curl_init($url);
-        if ($ch === false) {
-            throw new RuntimeException('curl_init failed');
-        }
+        $ch = self::handle();
         $curlHeaders = [];
         foreach ($reqHeaders as $k => $v) {
             $curlHeaders[] = $k . ': ' . $v;
         }
         $opts = [
+            CURLOPT_URL => $url,
             CURLOPT_RETURNTRANSFER => true,
             CURLOPT_CUSTOMREQUEST => strtoupper($method),
             CURLOPT_HTTPHEADER => $curlHeaders,
@@ -60,6 +80,7 @@ final class HttpClient
         $raw = curl_exec($ch);
         if ($raw === false) {
             $err = curl_error($ch);
+            self::$ch = null; // reconnect on next call
             curl_close($ch);
             throw new RuntimeException('cURL error: ' . $err);
         }
@@ -67,7 +88,6 @@ final class HttpClient
         $headerSize = curl_getinfo($ch, CURLINFO_HEADER_SIZE);
         $rawHeaders = substr($raw, 0, (int)$headerSize);
         $rawBody = substr($raw, (int)$headerSize);
-        curl_close($ch);
 
         $respHeaders = self::parseHeaders($rawHeaders);
         $decoded = json_decode($rawBody, true);
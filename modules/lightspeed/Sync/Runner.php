@@ -31,8 +31,7 @@ final class Runner
         while ($processed < $limit) {
             $batch = WorkItems::claim(min(50, $limit - $processed), $type);
             if ($batch === []) {
-                usleep(200 * 1000); // small backoff
-                break;
+                break; // queue drained; exit immediately
             }
             foreach ($batch as $job) {
                 $processed++;
@@ -16,30 +16,55 @@ $checks = [
   'queue'   => $base . '/queue.status.php',
 ];
 
-function fetch_json(string $url, int $timeout=5): array {
-  $ctx = stream_context_create([
-    'http' => ['method' => 'GET','timeout'=>$timeout,'ignore_errors'=>true,'header'=>"Accept: application/json\r\n"],
-    'ssl'  => ['verify_peer'=>true,'verify_peer_name'=>true],
-  ]);
-  $start = microtime(true);
-  $body = @file_get_contents($url, false, $ctx);
-  $code = 0; $hdrs = $GLOBALS['http_response_header'] ?? [];
-  foreach ($hdrs as $h) if (preg_match('/^HTTP\/\d+\.\d+\s+(\d+)/',$h,$m)) { $code=(int)$m[1]; break; }
-  $ms = (int)round((microtime(true)-$start)*1000);
-  $ok = $code>=200 && $code<400 && $body!==false;
-  $data = null;
-  if ($ok) {
-    $json = json_decode((string)$body, true);
-    if (is_array($json)) $data = $json;
+/**
+ * GET several URLs concurrently (curl_multi): the page costs the slowest check, not the sum of all of them.
+ * @param array<string,string> $urls name => url
+ * @return array<string,array> name => ['ok','code','ms','data','url']
+ */
+function fetch_json_all(array $urls, int $timeout=5): array {
+  $mh = curl_multi_init();
+  $handles = [];
+  foreach ($urls as $name=>$url) {
+    $ch = curl_init($url);
+    curl_setopt_array($ch, [
+      CURLOPT_RETURNTRANSFER => true,
+      CURLOPT_TIMEOUT        => $timeout,
+      CURLOPT_HTTPHEADER     => ['Accept: application/json'],
+    ]);
+    curl_multi_add_handle($mh, $ch);
+    $handles[$name] = $ch;
+  }
+  do {
+    $st = curl_multi_exec($mh, $running);
+    if ($running) curl_multi_select($mh, 1.0);
+  } while ($running && $st === CURLM_OK);
+
+  $out = [];
+  foreach ($handles as $name=>$ch) {
+    $body = curl_errno($ch) === 0 ? curl_multi_getcontent($ch) : false;
+    $code = (int)curl_getinfo($ch, CURLINFO_RESPONSE_CODE);
+    $ms = (int)round((float)curl_getinfo($ch, CURLINFO_TOTAL_TIME) * 1000);
+    $ok = $code>=200 && $code<400 && is_string($body);
+    $data = null;
+    if ($ok) {
+      $json = json_decode($body, true);
+      if (is_array($json)) $data = $json;
+    }
+    $out[$name] = ['ok'=>$ok,'code'=>$code,'ms'=>$ms,'data'=>$data,'url'=>$urls[$name]];
+    curl_multi_remove_handle($mh, $ch);
+    curl_close($ch);
   }
-  return ['ok'=>$ok,'code'=>$code,'ms'=>$ms,'data'=>$data,'url'=>$url];
+  curl_multi_close($mh);
+  return $out;
+}
+
+function fetch_json(string $url, int $timeout=5): array {
+  return fetch_json_all(['u' => $url], $timeout)['u'];
 }
 
-$results = [];
+$results = fetch_json_all($checks);
 $overallOk = true;
-foreach ($checks as $name=>$url) {
-  $r = fetch_json($url);
-  $results[$name] = $r;
+foreach ($results as $r) {
   if (!$r['ok']) $overallOk = false;
 }
 
@@ -22,17 +22,17 @@ $rows = $stmt->fetchAll(\PDO::FETCH_ASSOC) ?: [];
 // Heuristics to consider keys redundant/old
 $now = time();
 $toDelete = [];
+// Keep only the current vendor set we actively read from code (lowercased lookup set, built once)
+$keepVendor = array_fill_keys([
+    'vend.api_base','vend.retry_attempts','vend.timeout_seconds','vend_refresh_token','vend.http.enabled','vend.http_mock','webhook.enabled','webhook.fanout.enabled',
+], true);
 foreach ($rows as $r) {
     $key = (string)$r['config_label'];
     $val = (string)$r['config_value'];
     $ageDays = 0; if (!empty($r['updated_at'])) { $ageDays = max(0, (int) floor(($now - strtotime((string)$r['updated_at'])) / 86400)); }
     $redundant = false; $reason = '';
     if (preg_match('/^(vend\.|lightspeed\.)/i', $key)) {
-        // Keep only the current set we actively read from code
-        $keep = [
-            'vend.api_base','vend.retry_attempts','vend.timeout_seconds','vend_refresh_token','vend.http.enabled','vend.http_mock','webhook.enabled','webhook.fanout.enabled',
-        ];
-        if (!in_array(strtolower($key), array_map('strtolower',$keep), true)) { $redundant = true; $reason = 'legacy vendor key'; }
+        if (!isset($keepVendor[strtolower($key)])) { $redundant = true; $reason = 'legacy vendor key'; }
     }
     if (preg_match('/^(ls_|ls\.)/i', $key)) { $redundant = true; $reason = $reason ?: 'legacy ls_* key'; }
     if (stripos($key, 'deprecated') !== false) { $redundant = true; $reason = $reason ?: 'marked deprecated'; }
@@ -16,23 +16,64 @@ Http::commonJsonHeaders();
 $now = time();
 $pdo = DB::instance();
 
+// ---------- single-flight ----------
+// Overlapping calls (cron + monitor + manual refresh) would each collect metrics and re-apply the
+// same degrade actions; only one grades at a time, the others reply with the latest graded result.
+$gotLock = false;
+try { $gotLock = ((int)$pdo->query("SELECT GET_LOCK('cishub:health.grade', 0)")->fetchColumn() === 1); } catch (\Throwable $e) {}
+if ($gotLock) {
+  register_shutdown_function(static function () use ($pdo): void {
+    try { $pdo->query("SELECT RELEASE_LOCK('cishub:health.grade')"); } catch (\Throwable $e) {}
+  });
+} else {
+  $last = null;
+  try { $last = $pdo->query("SELECT grade, reasons, metrics, actions FROM system_health_log ORDER BY graded_at DESC LIMIT 1")->fetch(PDO::FETCH_ASSOC) ?: null; } catch (\Throwable $e) {}
+  if ($last) {
+    echo json_encode(['ok'=>true,'data'=>[
+      'grade'     => (string)$last['grade'],
+      'reasons'   => json_decode((string)$last['reasons'], true) ?: [],
+      'actions'   => json_decode((string)$last['actions'], true) ?: [],
+      'metrics'   => json_decode((string)$last['metrics'], true) ?: [],
+      'coalesced' => true,
+    ]], JSON_UNESCAPED_SLASHES);
+    return;
+  }
+  // No prior result to share yet: another run holds the lock (or it could not be taken); don't grade unguarded
+  echo json_encode(['ok'=>true,'data'=>[
+    'grade'     => null,
+    'status'    => 'grading_in_progress',
+    'coalesced' => true,
+  ]], JSON_UNESCAPED_SLASHES);
+  return;
+}
+
 // ---------- collect metrics ----------
+// Every probe goes through one wrapper that never throws: a failed query yields its neutral $default (it
+// must not push the grade to RED on its own) and is counted in metrics.errors, instead of aborting the
+// whole grading run with a fatal.
+$metricErrors = 0;
+$scalar = static function (string $sql, int $default = 0) use ($pdo, &$metricErrors): int {
+  try { return (int)$pdo->query($sql)->fetchColumn(); } catch (\Throwable $e) { $metricErrors++; return $default; }
+};
 $metrics = [
   'queue' => [
-    'pending'      => (int)($pdo->query("SELECT COUNT(*) FROM ls_jobs WHERE status='pending'")->fetchColumn() ?: 0),
-    'working'      => (int)($pdo->query("SELECT COUNT(*) FROM ls_jobs WHERE status IN('working','running')")->fetchColumn() ?: 0),
-    'done_1m'      => (int)($pdo->query("SELECT COUNT(*) FROM ls_jobs WHERE (status IN('done','completed') OR finished_at>=NOW()-INTERVAL 1 MINUTE OR completed_at>=NOW()-INTERVAL 1 MINUTE)")->fetchColumn() ?: 0),
-    'oldest_pending_age_s' => (int)($pdo->query("SELECT IFNULL(TIMESTAMPDIFF(SECOND,MIN(created_at),NOW()),0) FROM ls_jobs WHERE status='pending'")->fetchColumn() ?: 0),
-    'stuck_working_15m'    => (int)($pdo->query("SELECT COUNT(*) FROM ls_jobs WHERE (status IN('working','running')) AND (IFNULL(started_at,'1970-01-01') < NOW()-INTERVAL 15 MINUTE OR IFNULL(updated_at,'1970-01-01') < NOW()-INTERVAL 15 MINUTE)")->fetchColumn() ?: 0),
+    'pending'      => $scalar("SELECT COUNT(*) FROM ls_jobs WHERE status='pending'"),
+    'working'      => $scalar("SELECT COUNT(*) FROM ls_jobs WHERE status IN('working','running')"),
+    // Only tested for == 0 below: EXISTS stops at the first match instead of counting every finished job.
+    // Neutral on failure is 1 ("something finished"): 0 would fire no_completions_10m_with_backlog.
+    'done_1m'      => $scalar("SELECT EXISTS(SELECT 1 FROM ls_jobs WHERE (status IN('done','completed') OR finished_at>=NOW()-INTERVAL 1 MINUTE OR completed_at>=NOW()-INTERVAL 1 MINUTE))", 1),
+    'oldest_pending_age_s' => $scalar("SELECT IFNULL(TIMESTAMPDIFF(SECOND,MIN(created_at),NOW()),0) FROM ls_jobs WHERE status='pending'"),
+    'stuck_working_15m'    => $scalar("SELECT COUNT(*) FROM ls_jobs WHERE (status IN('working','running')) AND (IFNULL(started_at,'1970-01-01') < NOW()-INTERVAL 15 MINUTE OR IFNULL(updated_at,'1970-01-01') < NOW()-INTERVAL 15 MINUTE)"),
   ],
   'webhooks' => [
-    'last_event_age_s'    => (int)($pdo->query("SELECT IFNULL(TIMESTAMPDIFF(SECOND,MAX(received_at),NOW()),999999) FROM webhook_events")->fetchColumn() ?: 999999),
-    'last_processed_age_s'=> (int)($pdo->query("SELECT IFNULL(TIMESTAMPDIFF(SECOND,MAX(processed_at),NOW()),999999) FROM webhook_events")->fetchColumn() ?: 999999),
+    'last_event_age_s'    => $scalar("SELECT IFNULL(TIMESTAMPDIFF(SECOND,MAX(received_at),NOW()),999999) FROM webhook_events"),
+    'last_processed_age_s'=> $scalar("SELECT IFNULL(TIMESTAMPDIFF(SECOND,MAX(processed_at),NOW()),999999) FROM webhook_events"),
   ],
   'vendor' => [
     'cb_open'  => (int)(Config::getBool('vend.cb.tripped', false) ? 1 : 0), // optional
   ],
 ];
+$metrics['errors'] = $metricErrors;
 
 // recent http error rates (last 5m)
 try {
@@ -84,22 +125,22 @@ if ($grade === 'GREEN') {
   // restore
   if (Config::getBool('ui.readonly', false)) { Degrade::setReadOnly(false); $actions[]='readonly.off'; }
   Degrade::setBanner(false, 'info', '');
-  Config::set('queue.kill_all', false);
-  Config::set('webhook.fanout.enabled', true);
+  Degrade::setFlag('queue.kill_all', false);
+  Degrade::setFlag('webhook.fanout.enabled', true);
 }
 elseif ($grade === 'AMBER') {
   Degrade::setBanner(true, 'warning', 'System is catching up. Some actions slowed for safety.');
   // reduce high-risk concurrency (inventory.command)
   $cap = (int)(Config::get('vend.queue.max_concurrency.inventory.command', 1) ?? 1);
   if ($cap > 2) { Config::set('vend.queue.max_concurrency.inventory.command', 2); $actions[]='cap.inventory.command=2'; }
-  Config::set('queue.kill_all', false);
+  Degrade::setFlag('queue.kill_all', false);
   $actions[]='banner.warning';
 }
 else { // RED
   Degrade::setReadOnly(true);
   Degrade::setBanner(true, 'danger', 'CIS ↔ Vend degraded — writes paused to protect data.');
-  Config::set('queue.kill_all', true);
-  Config::set('webhook.fanout.enabled', false); // still ingest events
+  Degrade::setFlag('queue.kill_all', true);
+  Degrade::setFlag('webhook.fanout.enabled', false); // still ingest events
   $actions[]='readonly.on';
   $actions[]='kill_all.on';
   $actions[]='fanout.off';
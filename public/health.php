@@ -3,8 +3,6 @@ declare(strict_types=1);
 require_once __DIR__ . '/../src/PdoConnection.php';
 require_once __DIR__ . '/../src/Config.php';
 require_once __DIR__ . '/../src/PdoWorkItemRepository.php';
-require_once __DIR__ . '/../src/Lightspeed/OAuthClient.php';
-require_once __DIR__ . '/../src/Lightspeed/HttpClient.php';
 require_once __DIR__ . '/../src/Http.php';
 require_once __DIR__ . '/../src/Lightspeed/Web.php';
 \Queue\Lightspeed\Web::health();
@@ -0,0 +1,42 @@
+<?php
+declare(strict_types=1);
+
+/**
+ * assets/services/queue/public/healthz.php
+ *
+ * Probe fast path for load balancers / uptime monitors:
+ * - Liveness (default): static 200 once PHP is serving; no includes, no DB, no config reads
+ * - Readiness (?ready=1): reads the last health.php snapshot from APCu; 503 if the DB was down or the
+ *   snapshot is missing / older than its cache TTL plus a short grace
+ * HEAD is answered with status + headers only. Full diagnostics stay on health.php.
+ */
+
+$method = $_SERVER['REQUEST_METHOD'] ?? 'GET';
+header('Content-Type: application/json; charset=utf-8');
+header('Cache-Control: no-store');
+if ($method !== 'GET' && $method !== 'HEAD') {
+    header('Allow: GET, HEAD');
+    http_response_code(405);
+    echo '{"status":"method_not_allowed"}', "\n";
+    return;
+}
+
+$head = ($method === 'HEAD');
+if (!empty($_GET['ready'])) {
+    $snap = function_exists('apcu_fetch') ? apcu_fetch('cishub:health', $found) : null;
+    // The snapshot outlives the health cache TTL (stale-while-revalidate); past TTL + grace nobody is
+    // refreshing it, so it says nothing about the DB now and counts as missing.
+    if (is_array($snap) && (time() - (int)($snap['at'] ?? 0)) > (int)($snap['ttl'] ?? 5) + 10) { $snap = null; }
+    if (!is_array($snap)) {
+        // No (fresh) snapshot or no APCu: not provably ready; don't do the heavy check here
+        http_response_code(503);
+        if (!$head) { echo '{"status":"unknown"}', "\n"; }
+        return;
+    }
+    $ready = (($snap['data']['db'] ?? 'down') === 'ok');
+    http_response_code($ready ? 200 : 503);
+    if (!$head) { echo $ready ? '{"status":"ready"}' : '{"status":"not_ready"}', "\n"; }
+    return;
+}
+
+if (!$head) { echo '{"status":"ok"}', "\n"; }
@@ -39,7 +39,7 @@ function invq_increment(string $key, int $val = 1): void {
     try {
         $pdo = \Queue\PdoConnection::instance();
         $w = date('Y-m-d H:i:00');
-        $stmt = $pdo->prepare('INSERT INTO ls_rate_limits (rl_key, window_start, counter, updated_at) VALUES (:k,:w,:c,NOW()) ON DUPLICATE KEY UPDATE counter = counter + :c, updated_at = NOW()');
+        $stmt = $pdo->prepare('INSERT INTO ls_rate_limits (rl_key, window_start, counter, updated_at) VALUES (:k,:w,:c,NOW()) ON DUPLICATE KEY UPDATE counter = counter + VALUES(counter), updated_at = NOW()');
         $stmt->execute([':k' => $key, ':w' => $w, ':c' => $val]);
     } catch (\Throwable $e) { /* swallow */ }
 }
@@ -73,7 +73,7 @@ try {
         }
     } catch (Throwable $e) {}
 
-    echo json_encode(['success'=>true,'data'=>['job'=>$jobRow,'logs'=>$logs]]);
+    echo json_encode(['success'=>true,'data'=>['job'=>$jobRow,'logs'=>$logs]], JSON_UNESCAPED_SLASHES | JSON_UNESCAPED_UNICODE | JSON_INVALID_UTF8_SUBSTITUTE);
 } catch (Throwable $e) {
     http_response_code(500);
     echo json_encode(['success'=>false,'error'=>['code'=>'server_error','message'=>$e->getMessage()]]);
@@ -204,11 +204,12 @@ try {
             $w = $pdo->prepare(
                 "SELECT id, webhook_id, webhook_type, received_at
                  FROM webhook_events
-                 WHERE (payload LIKE :like OR headers LIKE :like) ".
+                 WHERE (payload LIKE :like OR headers LIKE :like2) ".
                  ($sinceClause ? " AND received_at >= DATE_SUB(NOW(), INTERVAL :m MINUTE) " : '' ) .
                 "ORDER BY id ASC LIMIT :lim"
             );
             $w->bindValue(':like', '%'.$trace.'%', PDO::PARAM_STR);
+            $w->bindValue(':like2', '%'.$trace.'%', PDO::PARAM_STR);
             if ($sinceClause) $w->bindValue(':m', $sinceMin, PDO::PARAM_INT);
             $w->bindValue(':lim', $limit, PDO::PARAM_INT);
             $w->execute();
@@ -224,17 +225,19 @@ try {
     }
 
     // ---------- sort and trim ----------
-    usort($events, static function(array $a, array $b): int {
-        $ta = strtotime((string)($a['time'] ?? '')); $tb = strtotime((string)($b['time'] ?? ''));
-        if ($ta === $tb) return 0;
-        return $ta <=> $tb;
-    });
+    // Parse each timestamp once (a comparator would re-parse both sides O(n log n) times), then stable-sort the keys
+    $keys = [];
+    foreach ($events as $i => $ev) { $keys[$i] = strtotime((string)($ev['time'] ?? '')); }
+    asort($keys);
+    $sorted = [];
+    foreach ($keys as $i => $_) { $sorted[] = $events[$i]; }
+    $events = $sorted;
 
     // (Optionally) cap final events list
     if (count($events) > $limit) $events = array_slice($events, -$limit);
 
     $out['events'] = $events;
-    echo json_encode($out);
+    echo json_encode($out, JSON_UNESCAPED_SLASHES | JSON_UNESCAPED_UNICODE | JSON_INVALID_UTF8_SUBSTITUTE);
 } catch (\Throwable $e) {
     http_response_code(500);
     echo json_encode(['ok'=>false,'error'=>$e->getMessage()]);
@@ -43,15 +43,14 @@ if (($_SERVER['REQUEST_METHOD'] ?? 'GET') === 'POST') {
         }
         $actionMsg = 'Reaper executed. ' . (count($out) ? h(implode("\n", array_slice($out, -3))) : '');
       } else {
-        // Spawn the CLI runner for a short burst (limit 5) to avoid in-process class dependency issues
-        $out = [];
-        $rc = 0;
-        $php = PHP_BINARY ?: 'php';
+        // Spawn the CLI runner for a short burst (limit 5) to avoid in-process class dependency issues.
+        // Detached: waiting on it would pin this FPM worker (and the operator's session lock) for as long
+        // as the jobs take, including vendor retry backoff. Same binary as the auto-kick spawn.
+        $php = (string) (Config::get('php.bin', 'php') ?? 'php');
         $bin = realpath(__DIR__ . '/../bin/run-jobs.php');
         if ($bin && is_file($bin)) {
-          @exec(escapeshellcmd($php) . ' ' . escapeshellarg($bin) . ' --limit=5 2>&1', $out, $rc);
-          $tail = $out ? implode("\n", array_slice($out, -3)) : '';
-          $actionMsg = 'Runner executed (limit 5). Exit=' . (int)$rc . ($tail !== '' ? (' — ' . h($tail)) : '');
+          @exec(escapeshellcmd($php) . ' ' . escapeshellarg($bin) . ' --limit=5 >/dev/null 2>&1 &');
+          $actionMsg = 'Runner started in background (limit 5). Refresh to see progress.';
         } else {
           $actionMsg = 'Runner script not found.';
         }
@@ -7,9 +7,10 @@ use Queue\PdoConnection; use Queue\Http;
 Http::commonJsonHeaders();
 try {
   $pdo = PdoConnection::instance();
-  $s1=$pdo->prepare('SELECT IS_FREE_LOCK(:k)'); $s1->execute([':k'=>'ls_runner:all']);
-  $free = ((int)($s1->fetchColumn() ?: 0) === 1);
-  $s2=$pdo->prepare('SELECT IS_USED_LOCK(:k)'); $s2->execute([':k'=>'ls_runner:all']);
-  $owner = $s2->fetchColumn();
+  // One probe: IS_USED_LOCK returns the holder's connection id, or NULL when the lock is free
+  $s=$pdo->prepare('SELECT IS_USED_LOCK(:k)'); $s->execute([':k'=>'ls_runner:all']);
+  $owner = $s->fetchColumn();
+  $free = ($owner === null || $owner === false);
+  if ($owner === false) { $owner = null; }
   Http::respond(true, ['free'=>$free,'owner_connection_id'=>$owner]);
 } catch (\Throwable $e) { Http::error('lock_state_failed',$e->getMessage(),null,500); }
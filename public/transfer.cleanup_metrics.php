@@ -23,26 +23,33 @@ try {
     $has = (bool) $pdo->query("SHOW TABLES LIKE 'transfer_queue_metrics'")->fetchColumn();
     if (!$has) { echo json_encode(['ok' => false, 'error' => ['code' => 'missing_table']]); return; }
 
-    $sel = $pdo->prepare("SELECT id FROM transfer_queue_metrics WHERE recorded_at < DATE_SUB(NOW(), INTERVAL :d DAY) ORDER BY id ASC LIMIT :lim");
-    $sel->bindValue(':d', $days, \PDO::PARAM_INT);
-    $sel->bindValue(':lim', $limit, \PDO::PARAM_INT);
-    $sel->execute();
-    $ids = $sel->fetchAll(\PDO::FETCH_COLUMN) ?: [];
-
     if ($dry) {
-        echo json_encode(['ok' => true, 'data' => ['candidates' => count($ids), 'deleted' => 0, 'dry_run' => true, 'older_than_days' => $days]]);
+        // Count in the server instead of shipping every candidate id to PHP
+        $cnt = $pdo->prepare("SELECT COUNT(*) FROM (SELECT id FROM transfer_queue_metrics WHERE recorded_at < DATE_SUB(NOW(), INTERVAL :d DAY) ORDER BY id ASC LIMIT :lim) c");
+        $cnt->bindValue(':d', $days, \PDO::PARAM_INT);
+        $cnt->bindValue(':lim', $limit, \PDO::PARAM_INT);
+        $cnt->execute();
+        echo json_encode(['ok' => true, 'data' => ['candidates' => (int)$cnt->fetchColumn(), 'deleted' => 0, 'dry_run' => true, 'older_than_days' => $days]]);
         return;
     }
 
+    // Delete in bounded chunks: a single IN (...) over up to 200k ids exceeded the 65535-placeholder limit of
+    // native prepares and held one huge transaction; each chunk here is short and needs no id list at all.
+    $chunk = 5000;
+    $del = $pdo->prepare("DELETE FROM transfer_queue_metrics WHERE recorded_at < DATE_SUB(NOW(), INTERVAL :d DAY) ORDER BY id ASC LIMIT :lim");
     $deleted = 0;
-    if ($ids) {
-        $place = implode(',', array_fill(0, count($ids), '?'));
-        $del = $pdo->prepare("DELETE FROM transfer_queue_metrics WHERE id IN ($place)");
-        $del->execute(array_map('intval', $ids));
-        $deleted = $del->rowCount();
+    while ($deleted < $limit) {
+        $n = min($chunk, $limit - $deleted);
+        $del->bindValue(':d', $days, \PDO::PARAM_INT);
+        $del->bindValue(':lim', $n, \PDO::PARAM_INT);
+        $del->execute();
+        $got = $del->rowCount();
+        $deleted += $got;
+        if ($got < $n) break;
     }
 
-    echo json_encode(['ok' => true, 'data' => ['candidates' => count($ids), 'deleted' => $deleted, 'older_than_days' => $days]]);
+    // No up-front candidate count on a real run (rows are matched chunk by chunk); dry_run reports candidates
+    echo json_encode(['ok' => true, 'data' => ['deleted' => $deleted, 'older_than_days' => $days]]);
 } catch (\Throwable $e) {
     echo json_encode(['ok' => false, 'error' => ['code' => 'cleanup_failed', 'message' => $e->getMessage()]]);
 }
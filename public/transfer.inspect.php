@@ -103,8 +103,8 @@ try {
     // audit
     if ($exists('transfer_audit_log')) {
         if ($id > 0) {
-            $st = $pdo->prepare('SELECT * FROM transfer_audit_log WHERE (transfer_pk = :id OR entity_pk = :id) ORDER BY id DESC LIMIT 200');
-            $st->execute([':id' => $id]);
+            $st = $pdo->prepare('SELECT * FROM transfer_audit_log WHERE (transfer_pk = :id OR entity_pk = :id2) ORDER BY id DESC LIMIT 200');
+            $st->execute([':id' => $id, ':id2' => $id]);
         } else {
             $st = $pdo->prepare('SELECT * FROM transfer_audit_log WHERE transfer_id = :pid ORDER BY id DESC LIMIT 200');
             $st->execute([':pid' => $publicId]);
@@ -119,7 +119,7 @@ try {
         $out['logs'] = $st->fetchAll(\PDO::FETCH_ASSOC) ?: [];
     }
 
-    echo json_encode(['ok' => true, 'data' => $out]);
+    echo json_encode(['ok' => true, 'data' => $out], JSON_UNESCAPED_SLASHES | JSON_UNESCAPED_UNICODE | JSON_INVALID_UTF8_SUBSTITUTE);
 } catch (\Throwable $e) {
     echo json_encode(['ok' => false, 'error' => ['code' => 'inspect_failed', 'message' => $e->getMessage()]]);
 }
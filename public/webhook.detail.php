@@ -29,7 +29,9 @@ try {
     }
     $row = $stmt->fetch(PDO::FETCH_ASSOC) ?: null;
 
-    echo json_encode(['success'=>true,'data'=>['webhook'=>$row]]);
+    // Stored payload/headers are JSON text: unescaped output avoids \/ and \uXXXX bloat, and a stray
+    // non-UTF-8 byte in a raw payload no longer makes json_encode() return false (an empty response)
+    echo json_encode(['success'=>true,'data'=>['webhook'=>$row]], JSON_UNESCAPED_SLASHES | JSON_UNESCAPED_UNICODE | JSON_INVALID_UTF8_SUBSTITUTE);
 } catch (Throwable $e) {
     http_response_code(500);
     echo json_encode(['success'=>false,'error'=>['code'=>'server_error','message'=>$e->getMessage()]]);
@@ -239,7 +239,7 @@ try {
             'events' => $out,
             'next_cursor' => $nextCursor,
         ],
-    ], JSON_UNESCAPED_SLASHES|JSON_UNESCAPED_UNICODE);
+    ], JSON_UNESCAPED_SLASHES|JSON_UNESCAPED_UNICODE|JSON_INVALID_UTF8_SUBSTITUTE);
 
 } catch (\Throwable $e) {
     Http::error('webhook_history_failed', $e->getMessage());
@@ -61,7 +61,7 @@ $rawBody     = file_get_contents('php://input') ?: '';
 $contentType = $_SERVER['CONTENT_TYPE'] ?? '';
 $headers     = [];
 foreach ($_SERVER as $k => $v) {
-  if (strpos($k, 'HTTP_') === 0 || in_array($k, ['CONTENT_TYPE','CONTENT_LENGTH'], true)) {
+  if (strncmp($k, 'HTTP_', 5) === 0 || $k === 'CONTENT_TYPE' || $k === 'CONTENT_LENGTH') {
     $headers[$k] = is_string($v) ? $v : json_encode($v);
   }
 }
@@ -69,8 +69,9 @@ foreach ($_SERVER as $k => $v) {
 // Decode payload (JSON or form payload=<json>)
 $payload = [];
 if (stripos($contentType, 'application/x-www-form-urlencoded') !== false) {
-  $form = [];
-  parse_str($rawBody, $form);
+  // The SAPI has already decoded the form into $_POST; only re-parse the raw body when it did not
+  $form = $_POST;
+  if (!isset($form['payload'])) { $form = []; parse_str($rawBody, $form); }
   $payloadStr = isset($form['payload']) ? (string)$form['payload'] : '';
   if ($payloadStr !== '') {
     $tmp = json_decode($payloadStr, true);
@@ -124,14 +125,15 @@ $whyFail  = null;
 
 $makeCandidates = function(string $secretUse) use ($rawBody, $tsHdr): array {
   $cands = [];
-  // raw body
-  $cands[] = base64_encode(hash_hmac('sha256', $rawBody, $secretUse, true));
-  $cands[] = hash_hmac('sha256', $rawBody, $secretUse, false);
+  // raw body: one binary digest gives both the base64 and hex encodings
+  $raw = hash_hmac('sha256', $rawBody, $secretUse, true);
+  $cands[] = base64_encode($raw);
+  $cands[] = bin2hex($raw);
   // timestamp + "." + body
   if ($tsHdr !== '') {
-    $combo = $tsHdr . '.' . $rawBody;
-    $cands[] = base64_encode(hash_hmac('sha256', $combo, $secretUse, true));
-    $cands[] = hash_hmac('sha256', $combo, $secretUse, false);
+    $raw = hash_hmac('sha256', $tsHdr . '.' . $rawBody, $secretUse, true);
+    $cands[] = base64_encode($raw);
+    $cands[] = bin2hex($raw);
   }
   return $cands;
 };
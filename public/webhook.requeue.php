@@ -32,13 +32,18 @@ try {
         $stmt->execute();
     }
     $rows = $stmt->fetchAll(\PDO::FETCH_ASSOC) ?: [];
-    $enq = 0;
+    $enq = 0; $failed = [];
+    $up = $pdo->prepare("UPDATE webhook_events SET status='processing', queue_job_id=:jid, updated_at=NOW() WHERE webhook_id=:wid");
     foreach ($rows as $r) {
         $wid = (string)$r['webhook_id']; $t = (string)$r['webhook_type'];
-        $jobId = Repo::addJob('webhook.event', ['webhook_id' => $wid, 'webhook_type' => $t], 'webhook:' . $wid);
-        $up = $pdo->prepare("UPDATE webhook_events SET status='processing', queue_job_id=:jid, updated_at=NOW() WHERE webhook_id=:wid");
-        $up->execute([':jid' => (string)$jobId, ':wid' => $wid]);
-        $enq++;
+        // One bad event must not abandon the rest of the batch half-done: record it and carry on
+        try {
+            $jobId = Repo::addJob('webhook.event', ['webhook_id' => $wid, 'webhook_type' => $t], 'webhook:' . $wid);
+            $up->execute([':jid' => (string)$jobId, ':wid' => $wid]);
+            $enq++;
+        } catch (\Throwable $e) {
+            if (count($failed) < 20) { $failed[] = ['webhook_id' => $wid, 'error' => $e->getMessage()]; }
+        }
     }
-    Http::respond(true, ['enqueued' => $enq]);
+    Http::respond(true, ['enqueued' => $enq, 'failed' => $failed]);
 } catch (\Throwable $e) { Http::error('requeue_failed', $e->getMessage()); }
@@ -53,7 +53,9 @@ try {
     try { $working = (int)($db->query("SELECT COUNT(*) FROM ls_jobs WHERE status IN('working','running')")->fetchColumn() ?: 0); } catch (\Throwable $e) {}
     try {
         // Detect columns
-        $hasCol = static function(string $name) use ($db): bool { try { $s=$db->prepare("SHOW COLUMNS FROM ls_jobs LIKE :c"); $s->execute([':c'=>$name]); return (bool)$s->fetchColumn(); } catch (\Throwable $e) { return false; } };
+        $colNames = [];
+        try { $colNames = array_flip($db->query('SHOW COLUMNS FROM ls_jobs')->fetchAll(\PDO::FETCH_COLUMN) ?: []); } catch (\Throwable $e) {}
+        $hasCol = static fn(string $name): bool => isset($colNames[$name]);
         $hasFin = $hasCol('finished_at'); $hasComp = $hasCol('completed_at'); $hasUpd = $hasCol('updated_at');
         if ($hasFin || $hasComp) {
             $parts = [];
@@ -25,7 +25,8 @@ CREATE TABLE IF NOT EXISTS ls_jobs (
   KEY idx_jobs_status_type (status,type,updated_at),
   KEY idx_jobs_status_priority (status,priority,updated_at),
   KEY idx_jobs_next (status,next_run_at),
-  KEY idx_jobs_lease (status,leased_until)
+  KEY idx_jobs_lease (status,leased_until),
+  KEY idx_jobs_status_created (status,created_at)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
 CREATE TABLE IF NOT EXISTS ls_job_logs (
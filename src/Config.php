@@ -37,7 +37,7 @@ final class Config
         try {
             $pdo = PdoConnection::instance();
             // Try fetch existing
-            $sel = $pdo->prepare('SELECT id FROM config_namespaces WHERE name = :n LIMIT 1');
+            $sel = PdoConnection::prepared('SELECT id FROM config_namespaces WHERE name = :n LIMIT 1');
             $sel->execute([':n' => $name]);
             $id = $sel->fetchColumn();
             if ($id !== false && $id !== null) { self::$nsId[$name] = (int)$id; return (int)$id; }
@@ -90,10 +90,10 @@ final class Config
             $ns = 'queue'; $key = $label;
             if (strpos($label, '.') !== false) { $parts = explode('.', $label, 2); $ns = $parts[0]; $key = $parts[1]; }
             try {
-                $pdo = PdoConnection::instance();
                 $nid = self::nsId($ns, false);
                 if ($nid) {
-                    $st = $pdo->prepare('SELECT value FROM config_items WHERE namespace_id = :n AND `key` = :k LIMIT 1');
+                    // Every distinct label misses the in-process cache once: reuse one statement handle for all of them
+                    $st = PdoConnection::prepared('SELECT value FROM config_items WHERE namespace_id = :n AND `key` = :k LIMIT 1');
                     $st->execute([':n' => $nid, ':k' => $key]);
                     $row = $st->fetch(PDO::FETCH_ASSOC);
                     if ($row && $row['value'] !== null && $row['value'] !== '') {
@@ -104,8 +104,7 @@ final class Config
             } catch (\Throwable $e) { /* fallback to legacy */ }
         }
         try {
-            $pdo = PdoConnection::instance();
-            $stmt = $pdo->prepare('SELECT config_value FROM configuration WHERE config_label = :l LIMIT 1');
+            $stmt = PdoConnection::prepared('SELECT config_value FROM configuration WHERE config_label = :l LIMIT 1');
             $stmt->execute([':l' => $label]);
             $row = $stmt->fetch(PDO::FETCH_ASSOC);
             if ($row && $row['config_value'] !== null && $row['config_value'] !== '') {
@@ -120,6 +119,15 @@ final class Config
         return $default;
     }
 
+    /**
+     * Drop labels from the in-process cache so the next get() reads the table again. For long-lived
+     * processes (the continuous runner) comparing against values other processes may have changed.
+     */
+    public static function forget(string ...$labels): void
+    {
+        foreach ($labels as $l) { unset(self::$cache[$l]); }
+    }
+
     public static function getBool(string $label, bool $default = false): bool
     {
         $v = self::get($label, $default);
@@ -185,6 +193,15 @@ final class Config
 
     private static function decode(string $raw)
     {
+        // Most values are bare flags/numbers/words: dispatch on the first byte and
+        // only hand structured values to the JSON parser.
+        if ($raw === 'true') return true;
+        if ($raw === 'false') return false;
+        $c = $raw[0] ?? '';
+        if ($c !== '{' && $c !== '[' && $c !== '"' && $c !== 'n') {
+            if (is_numeric($raw)) return $raw + 0;
+            if (!ctype_space($c)) return $raw;
+        }
         $j = json_decode($raw, true);
         if (json_last_error() === JSON_ERROR_NONE) return $j;
         if ($raw === 'true') return true;
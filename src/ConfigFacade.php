@@ -8,12 +8,16 @@ final class ConfigFacade
     /** Change if you prefer a different namespace label */
     private const NS = 'system.queue.lightspeed';
 
-    /** return [found(bool), value(mixed)] */
-    private static function v2GetRaw(string $key): array
+    /** @var bool|null whether cis-config's ConfigV2 is available (resolved once per process) */
+    private static ?bool $hasV2 = null;
+
+    /** Locate and include cis-config once; later lookups skip the filesystem probes. */
+    private static function hasV2(): bool
     {
+        if (self::$hasV2 !== null) return self::$hasV2;
         // Try to include cis-config if deployed
         $paths = [
-            $_SERVER['DOCUMENT_ROOT'] . '/cis-config/ConfigV2.php',
+            ($_SERVER['DOCUMENT_ROOT'] ?? '') . '/cis-config/ConfigV2.php',
             dirname(__DIR__, 3) . '/cis-config/ConfigV2.php',
         ];
         foreach ($paths as $p) {
@@ -22,7 +26,13 @@ final class ConfigFacade
                 break;
             }
         }
-        if (!class_exists('\\ConfigV2')) return [false, null];
+        return self::$hasV2 = class_exists('\\ConfigV2');
+    }
+
+    /** return [found(bool), value(mixed)] */
+    private static function v2GetRaw(string $key): array
+    {
+        if (!self::hasV2()) return [false, null];
         try {
             // ConfigV2::get(string $namespace, string $key, $default=null)
             $val = \ConfigV2::get(self::NS, $key, null);
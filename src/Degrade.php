@@ -18,8 +18,23 @@ final class Degrade
 {
     public static function isReadOnly(): bool { return Config::getBool('ui.readonly', false); }
     public static function isFeatureDisabled(string $feature): bool { return Config::getBool('ui.disable.' . $feature, false); }
-    public static function disableFeature(string $feature, bool $on): void { Config::set('ui.disable.' . $feature, $on); }
-    public static function setReadOnly(bool $on): void { Config::set('ui.readonly', $on); }
+    public static function disableFeature(string $feature, bool $on): void { self::setFlag('ui.disable.' . $feature, $on); }
+    public static function setReadOnly(bool $on): void { self::setFlag('ui.readonly', $on); }
+
+    /** Labels other processes (health.grade, operator toggles) may flip under a long-lived runner. */
+    private const SHARED_LABELS = ['ui.readonly', 'ui.disable.quick_qty', 'ui.banner.active', 'ui.banner.level', 'ui.banner.message'];
+
+    /**
+     * Write a boolean flag only when it differs from the stored value. Evaluators re-assert the same
+     * state on every run; each Config::set is an upsert plus a config_audit_log row. The comparison
+     * re-reads the stored value: the in-process cache may predate another process's change.
+     */
+    public static function setFlag(string $label, bool $on): void
+    {
+        Config::forget($label);
+        if (Config::getBool($label, !$on) === $on) return;
+        Config::set($label, $on);
+    }
 
     /** @return array{active:bool,level:string,message:string} */
     public static function banner(): array
@@ -33,12 +48,37 @@ final class Degrade
 
     public static function setBanner(bool $active, string $level, string $message): void
     {
+        Config::forget('ui.banner.active', 'ui.banner.level', 'ui.banner.message');
+        $cur = self::banner();
+        if ($cur['active'] === $active && $cur['level'] === $level && $cur['message'] === $message) return;
         Config::set('ui.banner.active', $active);
         Config::set('ui.banner.level', $level);
         Config::set('ui.banner.message', $message);
         Config::set('ui.banner.updated_at', time());
     }
 
+    /**
+     * Cross-process cooldown for autoEvaluate(): the first worker to claim the current
+     * period wins, others skip. Backed by an ls_rate_limits row (one key, rewritten each
+     * period) so it dedupes across runners without growing state. Fails open.
+     */
+    public static function claimEvaluationSlot(int $periodSeconds = 60): bool
+    {
+        $periodSeconds = max(1, $periodSeconds);
+        $window = date('Y-m-d H:i:s', intdiv(time(), $periodSeconds) * $periodSeconds);
+        try {
+            $pdo = PdoConnection::instance();
+            // The post-increment counter comes back through LAST_INSERT_ID(expr) on this connection: a separate
+            // SELECT could see another runner's increment too, and then nobody would claim the period.
+            $pdo->prepare('INSERT INTO ls_rate_limits (rl_key, window_start, counter, updated_at) VALUES (:k,:w,LAST_INSERT_ID(1),NOW())
+                           ON DUPLICATE KEY UPDATE counter = LAST_INSERT_ID(IF(window_start=:w2, counter+1, 1)), window_start = :w3, updated_at = NOW()')
+                ->execute([':k' => 'degrade:auto_eval', ':w' => $window, ':w2' => $window, ':w3' => $window]);
+            return (int)$pdo->lastInsertId() === 1;
+        } catch (\Throwable $e) {
+            return true;
+        }
+    }
+
     /** Auto-evaluate health and toggle degrade flags when needed. */
     public static function autoEvaluate(): array
     {
@@ -48,11 +88,15 @@ final class Degrade
         $resetAfter = (int) (Config::get('auto.degrade.reset_after_ok_min', 10) ?? 10);
         $now = time();
         $actions = [];
+        // Transition checks below must see flags as stored now, not as this (possibly long-lived) process last read them
+        Config::forget(...self::SHARED_LABELS);
         try {
             $pdo = PdoConnection::instance();
-            $pending = (int)$pdo->query("SELECT COUNT(*) FROM ls_jobs WHERE status='pending'")->fetchColumn();
-            $failed = (int)$pdo->query("SELECT COUNT(*) FROM ls_jobs WHERE status='failed'")->fetchColumn();
-            $oldest = (int)$pdo->query("SELECT IFNULL(TIMESTAMPDIFF(SECOND, MIN(created_at), NOW()),0) FROM ls_jobs WHERE status='pending'")->fetchColumn();
+            // One pass over the (status, created_at) index for all three figures
+            $r = $pdo->query("SELECT SUM(status='pending'), SUM(status='failed'),
+                                     IFNULL(TIMESTAMPDIFF(SECOND, MIN(IF(status='pending', created_at, NULL)), NOW()),0)
+                              FROM ls_jobs WHERE status IN ('pending','failed')")->fetch(\PDO::FETCH_NUM) ?: [];
+            [$pending, $failed, $oldest] = array_map('intval', array_pad($r, 3, 0));
             $cb = Config::get('vend.cb', ['tripped'=>false,'until'=>0]);
             $cbOpen = is_array($cb) && !empty($cb['tripped']) && $now < (int)($cb['until'] ?? 0);
 
@@ -65,12 +109,11 @@ final class Degrade
             }
 
             if ($enabled && $unhealthy) {
-                // Disable high-risk write forms first
-                self::disableFeature('quick_qty', true);
-                self::setReadOnly(true);
+                // Disable high-risk write forms first. Actions are reported on transition only, so a
+                // sustained incident yields one degrade.auto_eval alert instead of one per evaluation.
+                if (!self::isFeatureDisabled('quick_qty')) { self::disableFeature('quick_qty', true); $actions[] = 'disabled.quick_qty'; }
+                if (!self::isReadOnly()) { self::setReadOnly(true); $actions[] = 'readonly.on'; }
                 self::setBanner(true, 'danger', 'System is degraded (' . $reason . '). Some forms are temporarily disabled to protect data.');
-                $actions[] = 'disabled.quick_qty';
-                $actions[] = 'readonly.on';
             } else {
                 // Auto-clear after sustained healthy window
                 $lastOk = (int) (Config::get('auto.degrade.last_healthy', 0) ?? 0);
@@ -35,28 +35,7 @@ final class Http
         header('X-Content-Type-Options: nosniff');
         self::requestId();
         // Attach global health/degrade signal headers for all JSON endpoints
-        try {
-            // System banner (if Degrade exists and active)
-            if (class_exists('\\Queue\\Degrade')) {
-                $b = \Queue\Degrade::banner();
-                $active = (bool)($b['active'] ?? false);
-                header('X-CIS-Banner-Active: ' . ($active ? '1' : '0'));
-                if (!empty($b['level'])) { header('X-CIS-Banner-Level: ' . (string)$b['level']); }
-                if (!empty($b['message'])) {
-                    $msg = (string)$b['message'];
-                    $msg = str_replace(["\r","\n"], ' ', $msg);
-                    if (strlen($msg) > 512) { $msg = substr($msg, 0, 512); }
-                    header('X-CIS-Banner-Message: ' . $msg);
-                }
-            }
-            // Core degrade flags
-            if (class_exists('\\Queue\\Config')) {
-                $ro = \Queue\Config::getBool('ui.readonly', false);
-                header('X-CIS-Readonly: ' . ($ro ? '1' : '0'));
-                $qq = \Queue\Config::getBool('ui.disable.quick_qty', false);
-                header('X-CIS-Feature-QuickQty-Disabled: ' . ($qq ? '1' : '0'));
-            }
-        } catch (\Throwable $e) { /* non-fatal */ }
+        self::degradeHeaders();
     }
 
     public static function commonTextHeaders(): void
@@ -65,7 +44,14 @@ final class Http
         header('X-Content-Type-Options: nosniff');
         self::requestId();
         // Mirror degrade status for text endpoints too
+        self::degradeHeaders();
+    }
+
+    /** System banner + core degrade flags as X-CIS-* headers (shared by the JSON and text header sets). */
+    private static function degradeHeaders(): void
+    {
         try {
+            // System banner (if Degrade exists and active)
             if (class_exists('\\Queue\\Degrade')) {
                 $b = \Queue\Degrade::banner();
                 $active = (bool)($b['active'] ?? false);
@@ -78,20 +64,38 @@ final class Http
                     header('X-CIS-Banner-Message: ' . $msg);
                 }
             }
+            // Core degrade flags
             if (class_exists('\\Queue\\Config')) {
                 $ro = \Queue\Config::getBool('ui.readonly', false);
                 header('X-CIS-Readonly: ' . ($ro ? '1' : '0'));
                 $qq = \Queue\Config::getBool('ui.disable.quick_qty', false);
                 header('X-CIS-Feature-QuickQty-Disabled: ' . ($qq ? '1' : '0'));
             }
-        } catch (\Throwable $e) { /* ignore */ }
+        } catch (\Throwable $e) { /* non-fatal */ }
     }
 
     public static function respond(bool $ok, ?array $data = null, ?array $error = null, int $status = 200): void
     {
-        self::commonJsonHeaders();
-        http_response_code($status);
-        // Attach system/development warnings (non-breaking)
+        self::emit(self::envelope($ok, $ok ? ($data ?? []) : null, $error, $status), null, $status);
+    }
+
+    /**
+     * Success response whose `data` member is already JSON-encoded (e.g. a cached snapshot),
+     * spliced into the envelope so it is not decoded and re-encoded on every request.
+     */
+    public static function respondEncoded(string $dataJson, int $status = 200): void
+    {
+        if (self::wantsPretty()) {
+            $data = json_decode($dataJson, true);
+            self::respond(true, is_array($data) ? $data : [], null, $status);
+            return;
+        }
+        self::emit(self::envelope(true, null, null, $status), $dataJson, $status);
+    }
+
+    /** Build the standard response envelope (system/development warnings attached, non-breaking). */
+    private static function envelope(bool $ok, ?array $data, ?array $error, int $status): array
+    {
         $sysName = null; $dev = [];
         try { $sysName = (string)(Config::get('system.name', 'CISHUB') ?? 'CISHUB'); } catch (\Throwable $e) {}
         try { if (class_exists('\\Queue\\DevFlags')) { $dev = \Queue\DevFlags::active(); } } catch (\Throwable $e) {}
@@ -104,9 +108,9 @@ final class Http
             if ($host) { $url = $scheme . '://' . $host . $uri; }
         } catch (\Throwable $e) { $url = null; }
 
-        $payload = [
+        return [
             'ok' => $ok,
-            'data' => $ok ? ($data ?? []) : null,
+            'data' => $data,
             'error' => $ok ? null : ($error ?? ['code' => 'unknown_error', 'message' => 'Unknown error']),
             'status' => $status,
             'request_id' => self::requestId(),
@@ -115,13 +119,25 @@ final class Http
             'dev_flags' => $dev,
             'url' => $url,
         ];
+    }
 
+    /** Send headers + encoded envelope; $dataJson (if given) replaces the envelope's null `data`. */
+    private static function emit(array $payload, ?string $dataJson, int $status): void
+    {
+        self::commonJsonHeaders();
+        http_response_code($status);
+        // HEAD probes (uptime monitors) only need status + headers: skip building a body the server would discard
+        if (($_SERVER['REQUEST_METHOD'] ?? 'GET') === 'HEAD') { return; }
         $flags = JSON_UNESCAPED_SLASHES | JSON_UNESCAPED_UNICODE;
         if (self::wantsPretty()) { $flags |= JSON_PRETTY_PRINT; }
         $json = json_encode($payload, $flags);
         if ($json === false) {
             // Fallback minimal error-safe envelope
             $json = '{"ok":false,"error":{"code":"json_encode_failed"},"request_id":"' . self::requestId() . '"}';
+        } elseif ($dataJson !== null) {
+            // `ok` is a bool, so the first "data":null is the envelope member
+            $pos = strpos($json, '"data":null');
+            if ($pos !== false) { $json = substr_replace($json, '"data":' . $dataJson, $pos, 11); }
         }
         // Best-effort content length (harmless if output buffering modifies size later)
         try { header('Content-Length: ' . strlen($json) + 1); } catch (\Throwable $e) {}
@@ -181,12 +197,12 @@ final class Http
         $bucket = date('Y-m-d H:i:00');
         try {
             $pdo = PdoConnection::instance();
-            $pdo->prepare('INSERT INTO ls_rate_limits (rl_key, window_start, counter, updated_at) VALUES (:k,:w,1,NOW()) ON DUPLICATE KEY UPDATE counter = IF(window_start=:w, counter+1, 1), window_start = IF(window_start=:w, window_start, :w), updated_at=NOW()')
-                ->execute([':k' => $key, ':w' => $bucket]);
-            $row = $pdo->prepare('SELECT counter, window_start FROM ls_rate_limits WHERE rl_key=:k');
-            $row->execute([':k' => $key]);
-            $r = $row->fetch(\PDO::FETCH_ASSOC) ?: ['counter' => 0, 'window_start' => $bucket];
-            $count = (int)($r['counter'] ?? 0);
+            // One round-trip: the post-increment counter comes back through LAST_INSERT_ID(expr). Distinct
+            // placeholders because native prepares reject a reused named parameter (which used to throw
+            // here and fail open, i.e. never limit).
+            $pdo->prepare('INSERT INTO ls_rate_limits (rl_key, window_start, counter, updated_at) VALUES (:k,:w,LAST_INSERT_ID(1),NOW()) ON DUPLICATE KEY UPDATE counter = LAST_INSERT_ID(IF(window_start=:w2, counter+1, 1)), window_start = :w3, updated_at=NOW()')
+                ->execute([':k' => $key, ':w' => $bucket, ':w2' => $bucket, ':w3' => $bucket]);
+            $count = (int)$pdo->lastInsertId();
             if ($count > $limitPerMinute) {
                 $retry = 60 - (int) (time() % 60);
                 header('Retry-After: ' . $retry);
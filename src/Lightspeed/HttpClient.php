@@ -25,6 +25,7 @@ use Queue\Lightspeed\OAuthClient;
  *   - Circuit-breaker with decay (vend.cb: tripped/until/failures/window_started)
  *   - Stable metrics via ls_rate_limits buckets
  *   - Mock mode returns deterministic success with idempotency echoes
+ *   - One curl handle per process so connections are kept alive between calls
  */
 final class HttpClient
 {
@@ -60,6 +61,62 @@ final class HttpClient
         return 'https://x-series-api.lightspeedhq.com';
     }
 
+    /** @var \CurlHandle|resource|null reused across requests so keep-alive/TLS sessions survive */
+    private static $ch = null;
+
+    /**
+     * Return the process-wide curl handle, reset to defaults.
+     * A long-running worker issues many calls to the same tenant host; reusing the
+     * handle keeps its connection cache warm and skips a TCP+TLS handshake per call.
+     */
+    private static function handle()
+    {
+        if (self::$ch === null) {
+            $ch = curl_init();
+            if ($ch === false) throw new \RuntimeException('curl_init failed');
+            self::$ch = $ch;
+        } else {
+            curl_reset(self::$ch);
+        }
+        curl_setopt(self::$ch, CURLOPT_TCP_KEEPALIVE, 1);
+        // Probe idle connections after 60s so NAT/LB state stays warm between a worker's sparse calls
+        if (defined('CURLOPT_TCP_KEEPIDLE')) { curl_setopt(self::$ch, CURLOPT_TCP_KEEPIDLE, 60); curl_setopt(self::$ch, CURLOPT_TCP_KEEPINTVL, 30); }
+        $sh = self::share();
+        if ($sh !== null) { curl_setopt(self::$ch, CURLOPT_SHARE, $sh); }
+        return self::$ch;
+    }
+
+    /** @var \CurlShareHandle|resource|false|null */
+    private static $share = null;
+
+    /**
+     * Process-wide curl share handle (DNS cache, TLS sessions, connection pool).
+     * Attach it to any handle talking to Lightspeed (API or token endpoint) so a
+     * refresh and the request that follows it reuse the same sessions.
+     * @return \CurlShareHandle|resource|null
+     */
+    public static function share()
+    {
+        if (self::$share === null) {
+            self::$share = false;
+            try {
+                $sh = curl_share_init();
+                curl_share_setopt($sh, CURLSHOPT_SHARE, CURL_LOCK_DATA_DNS);
+                curl_share_setopt($sh, CURLSHOPT_SHARE, CURL_LOCK_DATA_SSL_SESSION);
+                if (defined('CURL_LOCK_DATA_CONNECT')) { curl_share_setopt($sh, CURLSHOPT_SHARE, CURL_LOCK_DATA_CONNECT); }
+                self::$share = $sh;
+            } catch (\Throwable $e) { /* sharing is an optimization only */ }
+        }
+        return self::$share === false ? null : self::$share;
+    }
+
+    /** Discard the shared handle (after transport errors) so the next call reconnects cleanly. */
+    private static function dropHandle(): void
+    {
+        if (self::$ch !== null) { try { curl_close(self::$ch); } catch (\Throwable $e) {} }
+        self::$ch = null;
+    }
+
     /** Core request with retry, CB, metrics, and mock. */
     private static function req(string $method, string $path, ?array $json, array $extraHeaders)
     {
@@ -83,8 +140,9 @@ final class HttpClient
         // Normalize known misplaced API endpoints (e.g., 2.1 -> 2.0 registers) before building URL
         $originalPath = $path;
         $path = self::normalizeEndpointPath($path, $didRewrite);
-        if (!empty($didRewrite)) {
-            try { \Queue\Logger::info('vend.http.rewrite', ['meta' => ['from' => $originalPath, 'to' => $path]]); } catch (\Throwable $e) { /* best-effort */ }
+        // The rewrite rules are static, so an affected endpoint logs on every call: keep that to debug mode
+        if (!empty($didRewrite) && \Queue\Logger::debugEnabled()) {
+            try { \Queue\Logger::debug('vend.http.rewrite', ['meta' => ['from' => $originalPath, 'to' => $path]]); } catch (\Throwable $e) { /* best-effort */ }
         }
 
         $url = (stripos($path, 'http') === 0) ? $path : (rtrim(self::vendorBase(), '/') . '/' . ltrim($path, '/'));
@@ -100,32 +158,34 @@ final class HttpClient
         $attempt   = 0;
         $max       = (int)(Config::get('vend.retry_attempts', 3) ?? 3);
         $timeout   = (int)(Config::get('vend.timeout_seconds', 30) ?? 30);
+        $connectTo = max(1, min($timeout, (int)(Config::get('vend.connect_timeout_seconds', 5) ?? 5)));
         $token     = OAuthClient::ensureValid();
-        $t0        = microtime(true);
+        $t0        = hrtime(true); // monotonic: latency must not jump with NTP adjustments
+        // Encode the body once per call; retries (429/5xx/401 refresh) resend the same bytes
+        $bodyJson  = $json !== null ? json_encode($json, JSON_UNESCAPED_SLASHES | JSON_UNESCAPED_UNICODE) : null;
 
         retry:
         $attempt++;
 
-        $hdr = array_merge([
-            'Authorization' => 'Bearer ' . $token,
-            'Accept'        => 'application/json',
-        ], $extraHeaders);
+        $defaults = ['Authorization' => 'Bearer ' . $token, 'Accept' => 'application/json'];
+        $hdr = $extraHeaders ? array_merge($defaults, $extraHeaders) : $defaults;
 
         $curlHeaders = [];
         foreach ($hdr as $k => $v) if ($k !== '' && $v !== '') $curlHeaders[] = $k . ': ' . $v;
 
-        $ch = curl_init($url);
-        if ($ch === false) throw new \RuntimeException('curl_init failed');
+        $ch = self::handle();
 
         $opts = [
+            CURLOPT_URL            => $url,
             CURLOPT_RETURNTRANSFER => true,
             CURLOPT_CUSTOMREQUEST  => strtoupper($method),
             CURLOPT_HTTPHEADER     => $curlHeaders,
             CURLOPT_TIMEOUT        => $timeout,
+            CURLOPT_CONNECTTIMEOUT => $connectTo,
             CURLOPT_HEADER         => true,
         ];
-        if ($json !== null) {
-            $opts[CURLOPT_POSTFIELDS] = json_encode($json, JSON_UNESCAPED_SLASHES | JSON_UNESCAPED_UNICODE);
+        if ($bodyJson !== null) {
+            $opts[CURLOPT_POSTFIELDS] = $bodyJson;
             $opts[CURLOPT_HTTPHEADER][] = 'Content-Type: application/json';
         }
         curl_setopt_array($ch, $opts);
@@ -141,7 +201,7 @@ final class HttpClient
                 'url' => $url,
                 'method' => strtoupper($method),
             ]]); } catch (\Throwable $logE) { /* best-effort */ }
-            curl_close($ch);
+            self::dropHandle();
             throw new \RuntimeException($errstr !== '' ? $errstr : ('curl_error #' . $errno));
         }
 
@@ -149,7 +209,6 @@ final class HttpClient
         $headerSize = (int)curl_getinfo($ch, CURLINFO_HEADER_SIZE);
         $rawHead    = substr($raw, 0, $headerSize);
         $rawBody    = substr($raw, $headerSize);
-        curl_close($ch);
 
         $respHeaders = self::parseHeaders($rawHead);
         $decoded     = json_decode($rawBody, true);
@@ -201,18 +260,20 @@ final class HttpClient
                 // simple expo backoff with jitter
                 $retryAfter = min(60 * $attempt, 240);
             }
-            $retryAfter += random_int(0, 2);
-            sleep($retryAfter);
-            goto retry;
+            $retryAfter += mt_rand(0, 2); // jitter needs no CSPRNG
+            // sleep() returns early with the seconds left when a signal lands (the runner's TERM/INT
+            // handler): hand back the transient response instead of retrying after being asked to stop.
+            if (sleep($retryAfter) === 0) { goto retry; }
         }
 
         // Metrics + CB bookkeeping
-        self::recordMetrics($method, $status, (int)round((microtime(true) - $t0) * 1000));
+        self::recordMetrics($method, $status, intdiv(hrtime(true) - $t0, 1000000));
 
         // CB update
         try {
             $cbNow = Config::get('vend.cb', ['tripped'=>false,'until'=>0,'failures'=>0,'window_started'=>0]);
             $cbNow = is_array($cbNow) ? $cbNow : ['tripped'=>false,'until'=>0,'failures'=>0,'window_started'=>0];
+            $cbBefore = $cbNow;
 
             $isTransient = ($status === 429 || $status >= 500);
             $window  = 120;
@@ -238,7 +299,8 @@ final class HttpClient
                 $cbNow['failures']= 0;
                 $cbNow['window_started'] = 0;
             }
-            Config::set('vend.cb', $cbNow);
+            // Closed breaker + success (the common case) changes nothing: skip the config upsert + audit row
+            if ($cbNow != $cbBefore) { Config::set('vend.cb', $cbNow); }
         } catch (\Throwable $e) {}
 
         // Treat 409 idempotent duplicates as success (common LS behavior)
@@ -260,6 +322,8 @@ final class HttpClient
         // Targeted fix: registers endpoint exists under 2.0, not 2.1 for our tenant usage
         // Apply replacement for any occurrence, preserving query/fragment automatically with string replacement.
         // Only replace exact segment "/api/2.1/registers" (optionally followed by /, ?, or end of string)
+        // Literal pre-check: almost every request path skips the config read and regex entirely
+        if (strpos($input, '/api/2.1/registers') === false) return $input;
         $enable = (bool)(Config::get('vend.http_rewrite.fix_registers_21_to_20', true) ?? true);
         if ($enable) {
             $pattern = '#/api/2\.1/(registers)(?=\b|/|\?|$)#';
@@ -276,9 +340,9 @@ final class HttpClient
 
     private static function parseHeaders(string $raw): array
     {
-        $lines = preg_split('/\r?\n/', trim($raw)) ?: [];
-        $out   = [];
-        foreach ($lines as $line) {
+        $out = [];
+        // Plain split on LF; the trims below drop any CR, so no regex engine is needed per response
+        foreach (explode("\n", $raw) as $line) {
             if (strpos($line, ':') !== false) {
                 [$k, $v] = explode(':', $line, 2);
                 $out[trim($k)] = trim($v);
@@ -296,35 +360,44 @@ final class HttpClient
                      (($status == 429) ? '429' :
                      (($status >= 400 && $status < 500) ? '4xx' : '5xx')));
 
-            self::bump('vend_http:requests_total:' . $m . ':' . $class, 1);
-            self::bump('vend_http:latency_sum_ms:' . $m, $latencyMs);
-            self::bump('vend_http:latency_count:' . $m, 1);
-
-            // bucket distribution
+            $bucket = 'inf';
             foreach ([50,100,200,400,800,1600,3200,10000] as $th) {
-                if ($latencyMs <= $th) {
-                    self::bump('vend_http:latency_bucket_ms:' . $m . ':le:' . $th, 1);
-                    return;
-                }
+                if ($latencyMs <= $th) { $bucket = (string)$th; break; }
             }
-            self::bump('vend_http:latency_bucket_ms:' . $m . ':le:inf', 1);
+            // One round-trip for all four counters of this request
+            self::bumpMany([
+                'vend_http:requests_total:' . $m . ':' . $class => 1,
+                'vend_http:latency_sum_ms:' . $m                 => $latencyMs,
+                'vend_http:latency_count:' . $m                  => 1,
+                'vend_http:latency_bucket_ms:' . $m . ':le:' . $bucket => 1,
+            ]);
         } catch (\Throwable $e) {}
     }
 
-    private static function bump(string $key, int $inc): void
+    /**
+     * Increment several ls_rate_limits counters in the current minute window with a single upsert.
+     * @param array<string,int> $incs rl_key => increment
+     */
+    private static function bumpMany(array $incs): void
     {
+        if (!$incs) return;
         try {
-            $pdo    = PdoConnection::instance();
             $window = date('Y-m-d H:i:00');
-            $stmt = $pdo->prepare(
+            $rows = []; $params = [];
+            foreach ($incs as $key => $inc) {
+                $rows[] = '(?, ?, ?, NOW())';
+                array_push($params, (string)$key, $window, (int)$inc);
+            }
+            // Assignments run left to right: counter compares against the old window_start.
+            $stmt = PdoConnection::prepared(
                 'INSERT INTO ls_rate_limits (rl_key, window_start, counter, updated_at)
-                 VALUES (:k, :w, :c, NOW())
+                 VALUES ' . implode(',', $rows) . '
                  ON DUPLICATE KEY UPDATE
-                   counter = IF(window_start=:w, counter + :c, :c),
-                   window_start = IF(window_start=:w, window_start, :w),
+                   counter = IF(window_start = VALUES(window_start), counter + VALUES(counter), VALUES(counter)),
+                   window_start = VALUES(window_start),
                    updated_at = NOW()'
             );
-            $stmt->execute([':k'=>$key, ':w'=>$window, ':c'=>$inc]);
+            $stmt->execute($params);
         } catch (\Throwable $e) {}
     }
 
@@ -243,6 +243,9 @@ final class OAuthClient
     {
         $ch = curl_init($url);
         if ($ch === false) throw new \RuntimeException('curl_init failed');
+        $timeout   = (int)(Config::get('vend.timeout_seconds', 30) ?? 30);
+        // Clamped like HttpClient: 0 would mean curl's own default, and connect must fit inside the total budget
+        $connectTo = max(1, min($timeout, (int)(Config::get('vend.connect_timeout_seconds', 5) ?? 5)));
         curl_setopt_array($ch, [
             CURLOPT_RETURNTRANSFER => true,
             CURLOPT_POST           => true,
@@ -251,8 +254,12 @@ final class OAuthClient
                 'Content-Type: application/x-www-form-urlencoded',
                 'Accept: application/json',
             ],
-            CURLOPT_TIMEOUT        => (int)(Config::get('vend.timeout_seconds', 30) ?? 30),
+            CURLOPT_TIMEOUT        => $timeout,
+            CURLOPT_CONNECTTIMEOUT => $connectTo,
         ]);
+        // Share DNS/TLS sessions/connections with HttpClient so the request after a refresh skips a handshake
+        $sh = HttpClient::share();
+        if ($sh !== null) { curl_setopt($ch, CURLOPT_SHARE, $sh); }
         $raw    = curl_exec($ch);
         if ($raw === false) { $e = curl_error($ch); curl_close($ch); throw new \RuntimeException($e); }
         $status = curl_getinfo($ch, CURLINFO_HTTP_CODE);
@@ -32,7 +32,7 @@ final class ProductsV21
     {
         // In mock mode, assume success to avoid false negatives
         try { if ((bool)(\Queue\Config::get('vend.http_mock', false) ?? false)) { return ['ok' => true, 'observed' => null, 'attempts' => 0]; } } catch (\Throwable $e) { /* ignore */ }
-        $deadline = microtime(true) + max(1, $timeoutSec);
+        $deadline = hrtime(true) + max(1, $timeoutSec) * 1000000000;
         $attempts = 0; $observed = null;
         $sleepMs = 250;
         do {
@@ -46,10 +46,12 @@ final class ProductsV21
                     }
                 }
             } catch (\Throwable $e) { /* ignore and retry */ }
-            // Backoff
-            usleep($sleepMs * 1000);
+            // Backoff, never sleeping past the deadline (a trailing sleep after the last read is pure latency)
+            $remainMs = intdiv($deadline - hrtime(true), 1000000);
+            if ($remainMs <= 0) break;
+            usleep(min($sleepMs, $remainMs) * 1000);
             $sleepMs = min(2000, $sleepMs * 2);
-        } while (microtime(true) < $deadline);
+        } while (hrtime(true) < $deadline);
         return ['ok' => false, 'observed' => is_int($observed) ? (int)$observed : null, 'attempts' => $attempts];
     }
 
@@ -61,10 +63,10 @@ final class ProductsV21
         while ($stack) {
             $node = array_pop($stack);
             if (is_array($node)) {
-                // Normalize array to associative or list
-                $isAssoc = array_keys($node) !== range(0, count($node) - 1);
+                // Normalize array to associative or list (without materialising a key list + range per node);
+                // [] stays "associative" as with the original keys-vs-range check, on both branches
+                $isAssoc = $node === [] || (function_exists('array_is_list') ? !array_is_list($node) : (array_keys($node) !== range(0, count($node) - 1)));
                 if ($isAssoc) {
-                    $keys = array_change_key_case(array_keys($node), CASE_LOWER);
                     $lower = [];
                     foreach ($node as $k => $v) { $lower[strtolower((string)$k)] = $v; }
                     $candOutlet = null;
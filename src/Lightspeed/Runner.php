@@ -19,6 +19,38 @@ if (!class_exists('\\CIS\\Transfers\\Stock\\PackHelper')) {
 
 final class Runner
 {
+    /** Known job types (must mirror switch cases in process()). If you add a new case, add it here too. */
+    private const JOB_TYPES = [
+        // Consignments / Transfers
+        'create_consignment',
+        'update_consignment',
+        'cancel_consignment',
+        'mark_transfer_partial',
+        'edit_consignment_lines',
+        'add_consignment_products',
+        // Webhooks and fanout
+        'webhook.event',
+        'sync_product',
+        'sync_inventory',
+        'sync_customer',
+        'sync_sale',
+        // Inventory commands & product updates
+        'inventory.command',
+        'push_product_update',
+        // Periodic pull tasks (scheduled)
+        'pull_products',
+        'pull_inventory',
+        'pull_consignments',
+    ];
+
+    /** webhook event type => child sync job type */
+    private const FANOUT_ROUTES = [
+        'product.update'   => 'sync_product',
+        'inventory.update' => 'sync_inventory',
+        'customer.update'  => 'sync_customer',
+        'sale.update'      => 'sync_sale',
+    ];
+
     public static function run(array $args): int
     {
         if (\Queue\FeatureFlags::isDisabled(\Queue\FeatureFlags::runnerEnabled())) {
@@ -38,6 +70,10 @@ final class Runner
         // Idle backoff (used in continuous mode)
         $idleBaseMs = (int) (Config::get('vend.queue.idle_sleep_ms', 500) ?? 500);
         $idleMaxMs  = (int) (Config::get('vend.queue.idle_sleep_max_ms', 5000) ?? 5000);
+        // Local health multiplier: saturating count of recent job failures (0..8). Each failure raises it,
+        // each success lowers it; a continuous runner pauses idleBase * lhm between batches while it is
+        // non-zero, so a failing upstream is not hammered back-to-back and recovery restores full speed.
+        $lhm = 0; $lhmMax = 8;
         $idleMs = max(50, min($idleBaseMs, $idleMaxMs));
 
         // Graceful shutdown
@@ -61,6 +97,9 @@ final class Runner
                 $stmt->execute([':k' => $lockKey]);
                 $got = $stmt->fetch(\PDO::FETCH_ASSOC);
                 $lockHeld = $got && (int)$got['got'] === 1;
+                // Tracked so the shutdown hook releases it if the loop dies on an uncaught error/fatal
+                // (otherwise the lock lingers until the persistent connection is recycled)
+                if ($lockHeld) { \Queue\PdoConnection::trackLock($lockKey, true); }
                 if (!$lockHeld) {
                     Logger::warn('runner.lock_busy', ['meta' => ['key' => $lockKey]]);
                     echo json_encode(['ok' => true, 'processed' => 0, 'note' => 'lock busy']) . "\n";
@@ -68,18 +107,20 @@ final class Runner
                 }
             } catch (\Throwable $e) { /* ignore lock acquisition errors */ }
         }
-
         $processed = 0;
-        // Throttled auto-degrade evaluator (runs at most once per minute when in continuous mode)
-        $lastAutoEval = 0;
+        $types = self::JOB_TYPES; $inTypes = null;
+        // Throttled auto-degrade evaluator (runs at most once per minute when in continuous mode).
+        // Cooldown uses the monotonic clock so NTP steps cannot skip or double-fire an evaluation.
+        $lastAutoEval = null;
         while (!$stop && ($continuous || ($processed < $limit && time() < $deadline))) {
             if (\Queue\FeatureFlags::killAll()) { Logger::warn('runner.killed'); break; }
             // Run auto-evaluator periodically to flip safeguards during incidents
             if ($continuous) {
-                $now = time();
-                if ($now - $lastAutoEval >= 60 && Config::getBool('auto.degrade.enabled', true)) {
+                $now = intdiv(hrtime(true), 1000000000);
+                if (($lastAutoEval === null || $now - $lastAutoEval >= 60) && Config::getBool('auto.degrade.enabled', true)) {
                     try {
-                        $res = Degrade::autoEvaluate();
+                        // Only one runner per minute evaluates; the rest would repeat the same counts and writes
+                        $res = Degrade::claimEvaluationSlot(60) ? Degrade::autoEvaluate() : null;
                         if (is_array($res) && !empty($res['actions'])) {
                             Logger::info('degrade.auto_eval', ['meta' => $res]);
                         }
@@ -95,34 +136,14 @@ final class Runner
             $candidateType = $type;
             try {
                 $pdo = \Queue\PdoConnection::instance();
-                // Known job types (must mirror switch cases below). If you add a new case, add it here too.
-                $types = [
-                    // Consignments / Transfers
-                    'create_consignment',
-                    'update_consignment',
-                    'cancel_consignment',
-                    'mark_transfer_partial',
-                    'edit_consignment_lines',
-                    'add_consignment_products',
-                    // Webhooks and fanout
-                    'webhook.event',
-                    'sync_product',
-                    'sync_inventory',
-                    'sync_customer',
-                    'sync_sale',
-                    // Inventory commands & product updates
-                    'inventory.command',
-                    'push_product_update',
-                    // Periodic pull tasks (scheduled)
-                    'pull_products',
-                    'pull_inventory',
-                    'pull_consignments',
-                ];
-                if ($candidateType !== null && $candidateType !== '' && !in_array($candidateType, $types, true)) {
-                    $types[] = $candidateType;
+                // Job type list and its quoted IN() fragment are built once per run, not per iteration
+                if ($inTypes === null) {
+                    if ($candidateType !== null && $candidateType !== '' && !in_array($candidateType, $types, true)) {
+                        $types[] = $candidateType;
+                    }
+                    $inTypes = implode(',', array_map(static fn($t) => $pdo->quote($t), $types));
                 }
                 // Build working counts
-                $inTypes = implode(',', array_map(static fn($t) => $pdo->quote($t), $types));
                 $counts = [];
                 // Support legacy schema where status='running' instead of 'working'
                 $rows = $pdo->query("SELECT type, COUNT(*) c FROM ls_jobs WHERE (status='working' OR status='running') AND type IN ($inTypes) GROUP BY type")->fetchAll(\PDO::FETCH_ASSOC) ?: [];
@@ -192,46 +213,49 @@ final class Runner
             if (!$batch) {
                 // No batch available. In continuous mode, idle-sleep and keep looping; else exit the worker loop.
                 if ($continuous) { usleep($idleMs * 1000); $idleMs = min($idleMaxMs, max($idleBaseMs, $idleMs * 2)); continue; }
-                usleep(200 * 1000); break; }
-            foreach ($batch as $job) {
+                break; }
+            foreach ($batch as $i => $job) {
                 $processed++;
-                $tJobStart = microtime(true);
+                $tJobStart = hrtime(true);
                 try {
                     Repo::heartbeat($job->id);
                     self::process($job->type, $job->payload, $job->id);
                     Repo::heartbeat($job->id);
                     Repo::complete($job->id);
-                    // Best-effort: record duration metric for this job type
-                    self::recordTransferQueueMetric('job_duration_ms', $job->type, (int) round((microtime(true) - $tJobStart) * 1000), [
-                        'job_id' => $job->id,
-                        'result' => 'success',
-                    ],
-                    isset($job->payload['source_outlet_id']) ? (string)$job->payload['source_outlet_id'] : null,
-                    isset($job->payload['dest_outlet_id']) ? (string)$job->payload['dest_outlet_id'] : null);
+                    if ($lhm > 0) { $lhm--; }
+                    $labels = ['job_id' => $job->id, 'result' => 'success'];
                 } catch (\Throwable $e) {
                     Logger::error('job.fail', ['job_id' => $job->id, 'meta' => ['err' => $e->getMessage()]]);
                     Repo::fail($job->id, $e->getMessage());
-                    // Best-effort: record failure duration metric
-                    self::recordTransferQueueMetric('job_duration_ms', $job->type, (int) round((microtime(true) - $tJobStart) * 1000), [
-                        'job_id' => $job->id,
-                        'result' => 'failed',
-                        'error' => substr($e->getMessage(), 0, 255),
-                    ],
+                    if ($lhm < $lhmMax) { $lhm++; }
+                    $labels = ['job_id' => $job->id, 'result' => 'failed', 'error' => substr($e->getMessage(), 0, 255)];
+                }
+                // Best-effort: record duration metric for this job type (one end-time read for either outcome)
+                self::recordTransferQueueMetric('job_duration_ms', $job->type, intdiv(hrtime(true) - $tJobStart, 1000000), $labels,
                     isset($job->payload['source_outlet_id']) ? (string)$job->payload['source_outlet_id'] : null,
                     isset($job->payload['dest_outlet_id']) ? (string)$job->payload['dest_outlet_id'] : null);
-                }
                 // Work was done: reset idle backoff
                 $idleMs = $idleBaseMs;
-                if ($stop || (!$continuous && time() >= $deadline) || (!$continuous && $processed >= $limit)) break 2;
+                if ($stop || (!$continuous && time() >= $deadline) || (!$continuous && $processed >= $limit)) {
+                    // Drain: the rest of this batch was claimed but never started; give it back rather than
+                    // leaving it 'working' until the reaper's stale threshold
+                    $rest = array_slice($batch, $i + 1);
+                    if ($rest) {
+                        try { Repo::release(array_map(static fn($j) => $j->id, $rest)); } catch (\Throwable $e) { /* reaper remains the backstop */ }
+                        Logger::info('runner.drain', ['meta' => ['released' => count($rest)]]);
+                    }
+                    break 2;
+                }
             }
+            if ($continuous && $lhm > 0) { usleep(min($idleMaxMs, $idleBaseMs * $lhm) * 1000); }
         }
 
         Logger::info('runner.done', ['meta' => ['processed' => $processed, 'continuous' => $continuous]]);
         if ($lockHeld && $lockKey) {
             try {
-                $pdo = \Queue\PdoConnection::instance();
-                $pdo->prepare('SELECT RELEASE_LOCK(:k)')->execute([':k' => $lockKey]);
+                \Queue\PdoConnection::instance()->prepare('SELECT RELEASE_LOCK(:k)')->execute([':k' => $lockKey]);
             } catch (\Throwable $e) { /* ignore */ }
+            \Queue\PdoConnection::trackLock($lockKey, false);
         }
         echo json_encode(['ok' => true, 'processed' => $processed]) . "\n";
         return 0;
@@ -240,7 +264,7 @@ final class Runner
     /** @param array<string,mixed> $payload */
     private static function process(string $type, array $payload, int $jobId): void
     {
-        Logger::info('job.process', ['job_id' => $jobId, 'meta' => ['type' => $type]]);
+        if (Logger::debugEnabled()) { Logger::debug('job.process', ['job_id' => $jobId, 'meta' => ['type' => $type]]); }
         switch ($type) {
             case 'webhook.event':
                 // Minimal handler: mark the webhook event completed and optionally fan-out child jobs
@@ -264,13 +288,7 @@ final class Runner
                     }
                     // Optional fanout to typed sync jobs if enabled
                     if (\Queue\Config::getBool('webhook.fanout.enabled', true)) {
-                        $routes = [
-                            'product.update' => 'sync_product',
-                            'inventory.update' => 'sync_inventory',
-                            'customer.update' => 'sync_customer',
-                            'sale.update' => 'sync_sale',
-                        ];
-                        $target = $routes[$etype] ?? null;
+                        $target = self::FANOUT_ROUTES[$etype] ?? null;
                         if ($target !== null && \Queue\Config::getBool('webhook.fanout.enable.' . str_replace('sync_', '', $target), true)) {
                             $primaryId = $payload['entity_id'] ?? null;
                             if ($primaryId === null && isset($payload['id'])) { $primaryId = $payload['id']; }
@@ -317,7 +335,7 @@ final class Runner
                     break;
                 }
 
-                $t0 = microtime(true);
+                $t0 = hrtime(true);
                 $resp = \Queue\Lightspeed\InventoryV20::adjust([
                     'product_id' => $pidRaw,
                     'outlet_id'  => $oid,
@@ -326,7 +344,7 @@ final class Runner
                     'note'       => 'inventory.command',
                     // 'idempotency_key' => $payload['idempotency_key'] ?? null,
                 ]);
-                $durMs = (int)round((microtime(true) - $t0) * 1000);
+                $durMs = intdiv(hrtime(true) - $t0, 1000000);
 
                 $st = (int)($resp['status'] ?? 0);
                 if ($st < 200 || $st >= 300) {
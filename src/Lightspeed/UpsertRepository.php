@@ -8,10 +8,21 @@ use PDO;
 
 final class UpsertRepository
 {
+    /** @var array<string,bool> tables already ensured by this process */
+    private static array $ensured = [];
+
+    /** Run the CREATE TABLE IF NOT EXISTS once per process instead of as a DDL round-trip before every row. */
+    private static function ensureTable(PDO $pdo, string $table, string $ddl): void
+    {
+        if (isset(self::$ensured[$table])) return;
+        $pdo->exec($ddl);
+        self::$ensured[$table] = true;
+    }
+
     public static function upsertProduct(array $p): void
     {
         $pdo = PdoConnection::instance();
-        $pdo->prepare('CREATE TABLE IF NOT EXISTS ls_products (
+        self::ensureTable($pdo, 'ls_products', 'CREATE TABLE IF NOT EXISTS ls_products (
             product_id BIGINT PRIMARY KEY,
             name VARCHAR(255) NULL,
             sku VARCHAR(128) NULL,
@@ -21,8 +32,8 @@ final class UpsertRepository
             is_active TINYINT(1) NOT NULL DEFAULT 1,
             updated_at DATETIME NULL,
             KEY idx_active (is_active)
-        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4')->execute();
-        $pdo->prepare('INSERT INTO ls_products (product_id,name,sku,price,brand,supplier,is_active,updated_at)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4');
+        PdoConnection::prepared('INSERT INTO ls_products (product_id,name,sku,price,brand,supplier,is_active,updated_at)
             VALUES (:id,:name,:sku,:price,:brand,:supplier,:active,:updated)
             ON DUPLICATE KEY UPDATE name=VALUES(name), sku=VALUES(sku), price=VALUES(price), brand=VALUES(brand), supplier=VALUES(supplier), is_active=VALUES(is_active), updated_at=VALUES(updated_at)')
             ->execute([
@@ -40,14 +51,14 @@ final class UpsertRepository
     public static function upsertInventory(array $i): void
     {
         $pdo = PdoConnection::instance();
-        $pdo->prepare('CREATE TABLE IF NOT EXISTS ls_inventory (
+        self::ensureTable($pdo, 'ls_inventory', 'CREATE TABLE IF NOT EXISTS ls_inventory (
             product_id BIGINT NOT NULL,
             outlet_id BIGINT NOT NULL,
             quantity INT NULL,
             updated_at DATETIME NULL,
             PRIMARY KEY (product_id, outlet_id)
-        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4')->execute();
-        $pdo->prepare('INSERT INTO ls_inventory (product_id,outlet_id,quantity,updated_at)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4');
+        PdoConnection::prepared('INSERT INTO ls_inventory (product_id,outlet_id,quantity,updated_at)
             VALUES (:pid,:oid,:qty,:updated)
             ON DUPLICATE KEY UPDATE quantity=VALUES(quantity), updated_at=VALUES(updated_at)')
             ->execute([
@@ -61,15 +72,15 @@ final class UpsertRepository
     public static function upsertConsignment(array $c): void
     {
         $pdo = PdoConnection::instance();
-        $pdo->prepare('CREATE TABLE IF NOT EXISTS ls_consignments (
+        self::ensureTable($pdo, 'ls_consignments', 'CREATE TABLE IF NOT EXISTS ls_consignments (
             consignment_id BIGINT PRIMARY KEY,
             status VARCHAR(32) NULL,
             outlet_from BIGINT NULL,
             outlet_to BIGINT NULL,
             created_at DATETIME NULL,
             updated_at DATETIME NULL
-        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4')->execute();
-        $pdo->prepare('INSERT INTO ls_consignments (consignment_id,status,outlet_from,outlet_to,created_at,updated_at)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4');
+        PdoConnection::prepared('INSERT INTO ls_consignments (consignment_id,status,outlet_from,outlet_to,created_at,updated_at)
             VALUES (:id,:status,:from,:to,:created,:updated)
             ON DUPLICATE KEY UPDATE status=VALUES(status), outlet_from=VALUES(outlet_from), outlet_to=VALUES(outlet_to), updated_at=VALUES(updated_at)')
             ->execute([
@@ -85,14 +96,14 @@ final class UpsertRepository
     public static function upsertConsignmentLine(array $l): void
     {
         $pdo = PdoConnection::instance();
-        $pdo->prepare('CREATE TABLE IF NOT EXISTS ls_consignment_products (
+        self::ensureTable($pdo, 'ls_consignment_products', 'CREATE TABLE IF NOT EXISTS ls_consignment_products (
             consignment_id BIGINT NOT NULL,
             product_id BIGINT NOT NULL,
             qty INT NULL,
             updated_at DATETIME NULL,
             PRIMARY KEY (consignment_id, product_id)
-        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4')->execute();
-        $pdo->prepare('INSERT INTO ls_consignment_products (consignment_id,product_id,qty,updated_at)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4');
+        PdoConnection::prepared('INSERT INTO ls_consignment_products (consignment_id,product_id,qty,updated_at)
             VALUES (:cid,:pid,:qty,:updated)
             ON DUPLICATE KEY UPDATE qty=VALUES(qty), updated_at=VALUES(updated_at)')
             ->execute([
@@ -105,15 +116,13 @@ final class UpsertRepository
 
     public static function setCursor(string $entity, string $cursor): void
     {
-        $pdo = PdoConnection::instance();
-        $pdo->prepare('INSERT INTO ls_sync_cursors (entity, cursor, updated_at) VALUES (:e,:c,NOW())
+        PdoConnection::prepared('INSERT INTO ls_sync_cursors (entity, cursor, updated_at) VALUES (:e,:c,NOW())
             ON DUPLICATE KEY UPDATE cursor=VALUES(cursor), updated_at=VALUES(updated_at)')->execute([':e' => $entity, ':c' => $cursor]);
     }
 
     public static function getCursor(string $entity): ?string
     {
-        $pdo = PdoConnection::instance();
-        $s = $pdo->prepare('SELECT cursor FROM ls_sync_cursors WHERE entity=:e');
+        $s = PdoConnection::prepared('SELECT cursor FROM ls_sync_cursors WHERE entity=:e');
         $s->execute([':e' => $entity]);
         $r = $s->fetch(PDO::FETCH_ASSOC);
         return $r ? (string)$r['cursor'] : null;
@@ -10,6 +10,9 @@ use Queue\Http;
 
 final class Web
 {
+    /** Non HTTP_* server keys captured with webhook headers */
+    private const WEBHOOK_EXTRA_HEADERS = ['CONTENT_TYPE' => true, 'CONTENT_LENGTH' => true];
+
     /** Public helper: spawn a background runner best-effort for given type (or null for any). */
     public static function kick(?string $type = null): void
     {
@@ -94,8 +97,9 @@ final class Web
                     $anomaly = true; $result['anomalies'][] = 'stale_worker_signals';
                 }
                 // If nothing is currently working recently
-                if ($lastStartedAt !== '' && strtotime($lastStartedAt) > 0) {
-                    $sinceStart = $now - (int)strtotime($lastStartedAt);
+                $startedTs = $lastStartedAt !== '' ? (int)strtotime($lastStartedAt) : 0;
+                if ($startedTs > 0) {
+                    $sinceStart = $now - $startedTs;
                     if ($sinceStart >= $staleStart) { $anomaly = true; $result['anomalies'][] = 'stale_started_at'; }
                 } else {
                     // No started_at seen; still anomalous if pending exists
@@ -169,6 +173,19 @@ final class Web
             } catch (\Throwable $e) {
                 // If lock check fails, proceed cautiously — singleflight in Runner will still prevent overlap
             }
+            // Bound spawns per short window: during a webhook burst the lock stays free until the first
+            // spawned runner has booted, so without this every request forks a runner that just exits.
+            try {
+                $win = max(1, (int) (Config::get('vend.queue.auto_kick.window_sec', 5) ?? 5));
+                $maxKicks = max(1, (int) (Config::get('vend.queue.auto_kick.max_per_window', 1) ?? 1));
+                $w = date('Y-m-d H:i:s', intdiv(time(), $win) * $win);
+                $kk = 'runner_kick:' . ($type ?: 'all');
+                $pdo = PdoConnection::instance();
+                $pdo->prepare('INSERT INTO ls_rate_limits (rl_key, window_start, counter, updated_at) VALUES (:k,:w,LAST_INSERT_ID(1),NOW())
+                               ON DUPLICATE KEY UPDATE counter = LAST_INSERT_ID(IF(window_start=:w2, counter+1, 1)), window_start = :w3, updated_at = NOW()')
+                    ->execute([':k' => $kk, ':w' => $w, ':w2' => $w, ':w3' => $w]);
+                if ((int)$pdo->lastInsertId() > $maxKicks) { return; }
+            } catch (\Throwable $e) { /* fail-open: Runner single-flight still prevents overlap */ }
 
             // Resolve runner path
             $base = dirname(__DIR__, 2); // .../assets/services/queue
@@ -520,8 +537,30 @@ final class Web
     /** Health: DB, token, queue counts, cursors, webhooks summary */
     public static function health(): void
     {
+        // Short-TTL snapshot shared across FPM workers (APCu, when loaded) so bursts of monitor/LB polls
+        // collapse into one real check. A stale copy is served while another worker holds the refresh slot.
+        $ttl = (int)(Config::get('vend.health.cache_ttl_s', 5) ?? 5);
+        $useCache = $ttl > 0 && function_exists('apcu_fetch') && empty($_GET['fresh']);
+        if ($useCache) {
+            $hit = apcu_fetch('cishub:health', $found);
+            if ($found && is_array($hit) && isset($hit['json'])) {
+                $age = time() - (int)($hit['at'] ?? 0);
+                if ($age < $ttl || !apcu_add('cishub:health:refresh', 1, 10)) {
+                    // Serve the snapshot's pre-encoded JSON as-is; age goes in a header so the bytes stay reusable
+                    header('X-Health-Cache-Age: ' . $age);
+                    Http::respondEncoded((string)$hit['json']);
+                    return;
+                }
+            }
+        }
+        // Probe the shared (persistent) connection; if it has gone stale, drop it and retry once on a
+        // fresh one instead of reporting down and failing every count below on the same dead handle.
         $db = 'down';
-        try { PdoConnection::instance()->query('SELECT 1'); $db = 'ok'; } catch (\Throwable $e) {}
+        try { PdoConnection::instance()->query('SELECT 1'); $db = 'ok'; }
+        catch (\Throwable $e) {
+            PdoConnection::forget();
+            try { PdoConnection::instance()->query('SELECT 1'); $db = 'ok'; } catch (\Throwable $e2) {}
+        }
         // Support alternate key styles for expiry (underscore and dot)
         $expRaw = Config::get('vend_token_expires_at', null);
         if ($expRaw === null || $expRaw === '') { $expRaw = Config::get('vend.token.expires_at', 0); }
@@ -533,32 +572,47 @@ final class Web
             if ($hasDotToken && ($expRaw === null || $expRaw === '' || (int)$exp === 0)) { $left = null; }
         } catch (\Throwable $e) { /* ignore */ }
         $counts = ['pending'=>0,'working'=>0,'failed'=>0];
-        $dlq = 0; $oldest = 0; $longest = 0; $cursorStatus = [];
+        $dlq = 0; $oldest = 0; $longest = 0; $cursorStatus = []; $checksFailed = 0;
         try {
             $pdo = PdoConnection::instance();
-            $counts['pending'] = (int)$pdo->query("SELECT COUNT(*) c FROM ls_jobs WHERE status='pending'")->fetchColumn();
-            $counts['working'] = (int)$pdo->query("SELECT COUNT(*) c FROM ls_jobs WHERE status='working'")->fetchColumn();
-            $counts['failed']  = (int)$pdo->query("SELECT COUNT(*) c FROM ls_jobs WHERE status='failed'")->fetchColumn();
-            $dlq = (int)$pdo->query("SELECT COUNT(*) FROM ls_jobs_dlq")->fetchColumn();
-            $oldest = (int)$pdo->query("SELECT IFNULL(TIMESTAMPDIFF(SECOND, MIN(created_at), NOW()),0) FROM ls_jobs WHERE status='pending'")->fetchColumn();
-            $longest = (int)$pdo->query("SELECT IFNULL(TIMESTAMPDIFF(SECOND, MIN(started_at), NOW()),0) FROM ls_jobs WHERE status='working'")->fetchColumn();
+            // Per-query time bound, statement-scoped so no session state leaks onto the persistent handle:
+            // one slow COUNT on a large table degrades its own figure instead of stalling the whole probe.
+            // MariaDB ignores the MAX_EXECUTION_TIME optimizer hint, so it gets SET STATEMENT ... FOR instead.
+            $ms = max(100, (int)(Config::get('vend.health.query_timeout_ms', 2000) ?? 2000));
+            if ((PdoConnection::serverInfo()['flavor'] ?? null) === 'mariadb') {
+                $prefix = 'SET STATEMENT max_statement_time=' . sprintf('%.3F', $ms / 1000) . ' FOR ';
+                $hint = static fn(string $sql): string => $prefix . $sql;
+            } else {
+                $hint = static fn(string $sql): string => substr_replace($sql, 'SELECT /*+ MAX_EXECUTION_TIME(' . $ms . ') */', 0, 6);
+            }
+            $scalar = static function (string $sql, ?int $default = 0) use ($pdo, $hint, &$checksFailed): ?int {
+                try {
+                    return (int)$pdo->query($hint($sql))->fetchColumn();
+                } catch (\Throwable $e) { $checksFailed++; return $default; }
+            };
+            // Status counts and ages in one index range pass over (status, created_at) instead of five queries
+            try {
+                $r = $pdo->query($hint("SELECT SUM(status='pending'), SUM(status='working'), SUM(status='failed'),
+                                               IFNULL(TIMESTAMPDIFF(SECOND, MIN(IF(status='pending', created_at, NULL)), NOW()),0),
+                                               IFNULL(TIMESTAMPDIFF(SECOND, MIN(IF(status='working', started_at, NULL)), NOW()),0)
+                                        FROM ls_jobs WHERE status IN ('pending','working','failed')"))->fetch(\PDO::FETCH_NUM) ?: [];
+                [$counts['pending'], $counts['working'], $counts['failed'], $oldest, $longest] = array_map('intval', array_pad($r, 5, 0));
+            } catch (\Throwable $e) { $checksFailed++; }
+            $dlq = $scalar("SELECT COUNT(*) FROM ls_jobs_dlq");
 
             $entities = [ 'products' => 'ls_products', 'inventory' => 'ls_inventory', 'consignments' => 'ls_consignments' ];
             foreach ($entities as $entity => $table) {
-                try {
-                    $age = (int)$pdo->query("SELECT IFNULL(TIMESTAMPDIFF(SECOND, MAX(updated_at), NOW()),0) FROM {$table}")->fetchColumn();
-                    $rows15 = (int)$pdo->query("SELECT COUNT(*) FROM {$table} WHERE updated_at >= DATE_SUB(NOW(), INTERVAL 15 MINUTE)")->fetchColumn();
-                    $cursorStatus[$entity] = [ 'age_seconds' => $age, 'rows_15m' => $rows15 ];
-                } catch (\Throwable $e) {}
+                // null on failure: an unreadable table is left out rather than reported as age 0 ("just updated")
+                $age = $scalar("SELECT IFNULL(TIMESTAMPDIFF(SECOND, MAX(updated_at), NOW()),0) FROM {$table}", null);
+                $rows15 = $age === null ? null : $scalar("SELECT COUNT(*) FROM {$table} WHERE updated_at >= DATE_SUB(NOW(), INTERVAL 15 MINUTE)", null);
+                if ($rows15 !== null) { $cursorStatus[$entity] = [ 'age_seconds' => $age, 'rows_15m' => $rows15 ]; }
             }
-            try {
-                $subsActive = (int)$pdo->query("SELECT COUNT(*) FROM webhook_subscriptions WHERE is_active=1")->fetchColumn();
-                $lastEventAge = (int)$pdo->query("SELECT IFNULL(TIMESTAMPDIFF(SECOND, MAX(received_at), NOW()), 999999) FROM webhook_events")->fetchColumn();
-                $eventsToday = (int)$pdo->query("SELECT COUNT(*) FROM webhook_events WHERE received_at >= CURRENT_DATE")->fetchColumn();
-                $processedToday = (int)$pdo->query("SELECT COUNT(*) FROM webhook_events WHERE processed_at >= CURRENT_DATE")->fetchColumn();
-                $lastProcessedAge = (int)$pdo->query("SELECT IFNULL(TIMESTAMPDIFF(SECOND, MAX(processed_at), NOW()), 999999) FROM webhook_events")->fetchColumn();
-                $cursorStatus['webhooks'] = [ 'subscriptions_active' => $subsActive, 'last_event_age_seconds' => $lastEventAge, 'events_today' => $eventsToday, 'events_processed_today' => $processedToday, 'last_processed_age_seconds' => $lastProcessedAge ];
-            } catch (\Throwable $e) {}
+            $subsActive = $scalar("SELECT COUNT(*) FROM webhook_subscriptions WHERE is_active=1");
+            $lastEventAge = $scalar("SELECT IFNULL(TIMESTAMPDIFF(SECOND, MAX(received_at), NOW()), 999999) FROM webhook_events", 999999);
+            $eventsToday = $scalar("SELECT COUNT(*) FROM webhook_events WHERE received_at >= CURRENT_DATE");
+            $processedToday = $scalar("SELECT COUNT(*) FROM webhook_events WHERE processed_at >= CURRENT_DATE");
+            $lastProcessedAge = $scalar("SELECT IFNULL(TIMESTAMPDIFF(SECOND, MAX(processed_at), NOW()), 999999) FROM webhook_events", 999999);
+            $cursorStatus['webhooks'] = [ 'subscriptions_active' => $subsActive, 'last_event_age_seconds' => $lastEventAge, 'events_today' => $eventsToday, 'events_processed_today' => $processedToday, 'last_processed_age_seconds' => $lastProcessedAge ];
         } catch (\Throwable $e) {}
         // Minimal flags snapshot for ops visibility
         $flags = [];
@@ -577,7 +631,13 @@ final class Web
                 'vend.queue.auto_kick.enabled' => (bool) Config::getBool('vend.queue.auto_kick.enabled', true),
             ];
         } catch (\Throwable $e) { /* ignore flag fetch errors */ }
-    Http::respond(true, [ 'db'=>$db, 'token_expires_in'=>$left, 'jobs'=>$counts, 'dlq_count'=>$dlq, 'oldest_pending_age_sec'=>$oldest, 'longest_working_age_sec'=>$longest, 'cursor_status'=>$cursorStatus, 'flags'=>$flags ]);
+        $data = [ 'db'=>$db, 'token_expires_in'=>$left, 'jobs'=>$counts, 'dlq_count'=>$dlq, 'oldest_pending_age_sec'=>$oldest, 'longest_working_age_sec'=>$longest, 'cursor_status'=>$cursorStatus, 'checks_failed'=>$checksFailed, 'flags'=>$flags ];
+        if ($useCache) {
+            $json = json_encode($data, JSON_UNESCAPED_SLASHES | JSON_UNESCAPED_UNICODE);
+            if ($json !== false) { apcu_store('cishub:health', ['at' => time(), 'ttl' => $ttl, 'data' => $data, 'json' => $json], max(60, $ttl * 12)); }
+            apcu_delete('cishub:health:refresh');
+        }
+        Http::respond(true, $data);
     }
 
     /** Enqueue a job (create_consignment|update_consignment|push_product_update|...) */
@@ -650,10 +710,8 @@ final class Web
                 'trace_id' => $traceId,
                 'extras' => is_array($extras) ? json_encode($extras, JSON_UNESCAPED_SLASHES|JSON_UNESCAPED_UNICODE) : (is_string($extras) ? $extras : null),
             ];
-            $use = [];$params = [];
-            foreach ($allowed as $k => $v) {
-                if (in_array($k, $cols, true)) { $use[$k] = $v; }
-            }
+            // Column-set intersection by key instead of an in_array() scan per candidate column
+            $use = array_intersect_key($allowed, array_flip($cols)); $params = [];
             // created_at optional
             $sqlCols = array_keys($use);
             $place = array_map(fn($c) => ':' . $c, $sqlCols);
@@ -680,6 +738,7 @@ final class Web
     public static function webhook(): void
     {
         Http::commonJsonHeaders();
+        $kickAfterAck = false;
         if (!Config::getBool('LS_WEBHOOKS_ENABLED', true)) { http_response_code(403); echo json_encode(['ok'=>false,'error'=>['code'=>'disabled']]); return; }
     // Per Lightspeed docs, the signature uses the application's client_secret as HMAC key.
     // Support either an explicit vend_webhook_secret or fall back to vend.client_secret.
@@ -706,8 +765,9 @@ final class Web
         $in = [];
         $rawPayload = $body; // store as received
         if (stripos($contentType, 'application/x-www-form-urlencoded') !== false) {
-            $form = [];
-            parse_str($body, $form);
+            // The SAPI has already decoded the form into $_POST; only re-parse the raw body when it did not
+            $form = $_POST;
+            if (!isset($form['payload'])) { $form = []; parse_str($body, $form); }
             $payloadStr = isset($form['payload']) ? (string)$form['payload'] : '';
             if ($payloadStr !== '') {
                 $decoded = json_decode($payloadStr, true);
@@ -744,28 +804,21 @@ final class Web
                 $sigVal = $parts['signature'] ?? '';
                 $algo = strtoupper($parts['algorithm'] ?? 'HMAC-SHA256');
             }
-            $candidates = [];
-            if ($algo === 'HMAC-SHA256') {
-                // Body-only per docs
-                $candidates[] = base64_encode(hash_hmac('sha256', $body, $shared, true));
-                $candidates[] = hash_hmac('sha256', $body, $shared, false); // hex
-                // Legacy variant: timestamp.body used in older implementations
-                if ($timestamp !== '') {
-                    $candidates[] = base64_encode(hash_hmac('sha256', $timestamp . '.' . $body, $shared, true));
-                    $candidates[] = hash_hmac('sha256', $timestamp . '.' . $body, $shared, false);
-                }
+            $ok = false;
+            if ($algo === 'HMAC-SHA256' && is_string($sigVal) && $sigVal !== '') {
+                // One raw digest per (secret, message) yields both accepted encodings; stop at the first match
+                $matches = static function (string $msg, string $key) use ($sigVal): bool {
+                    $raw = hash_hmac('sha256', $msg, $key, true);
+                    return hash_equals(base64_encode($raw), $sigVal) || hash_equals(bin2hex($raw), $sigVal);
+                };
+                $secrets = [$shared];
                 // Previous secret during rotation
-                if ($sharedPrev !== '' && $sharedPrevExp > 0 && time() <= $sharedPrevExp) {
-                    $candidates[] = base64_encode(hash_hmac('sha256', $body, $sharedPrev, true));
-                    $candidates[] = hash_hmac('sha256', $body, $sharedPrev, false);
-                    if ($timestamp !== '') {
-                        $candidates[] = base64_encode(hash_hmac('sha256', $timestamp . '.' . $body, $sharedPrev, true));
-                        $candidates[] = hash_hmac('sha256', $timestamp . '.' . $body, $sharedPrev, false);
-                    }
+                if ($sharedPrev !== '' && $sharedPrevExp > 0 && time() <= $sharedPrevExp) { $secrets[] = $sharedPrev; }
+                foreach ($secrets as $key) {
+                    // Body-only per docs; legacy variant: timestamp.body used in older implementations
+                    if ($matches($body, $key) || ($timestamp !== '' && $matches($timestamp . '.' . $body, $key))) { $ok = true; break; }
                 }
             }
-            $ok = false;
-            foreach ($candidates as $cand) { if (is_string($sigVal) && $sigVal !== '' && hash_equals($sigVal, $cand)) { $ok = true; break; } }
             if (!$ok) {
                 // Soft-fail: note mismatch but continue processing
                 $authState = $authState === 'stale' ? 'stale' : 'mismatch';
@@ -805,21 +858,21 @@ final class Web
         try {
             $pdo = PdoConnection::instance();
             $headers = [];
-            foreach ($_SERVER as $k=>$v) { if (strpos($k, 'HTTP_') === 0 || in_array($k, ['CONTENT_TYPE','CONTENT_LENGTH'], true)) { $headers[$k] = is_string($v) ? $v : json_encode($v); } }
+            foreach ($_SERVER as $k=>$v) { if (strncmp($k, 'HTTP_', 5) === 0 || isset(self::WEBHOOK_EXTRA_HEADERS[$k])) { $headers[$k] = is_string($v) ? $v : json_encode($v); } }
             $webhookId = $_SERVER['HTTP_X_LS_WEBHOOK_ID'] ?? sha1(((string)$timestamp) . '.' . $body);
             $ip = $_SERVER['REMOTE_ADDR'] ?? ''; $ua = $_SERVER['HTTP_USER_AGENT'] ?? '';
             $payloadJson = json_encode($in, JSON_UNESCAPED_SLASHES | JSON_UNESCAPED_UNICODE);
             $headersJson = json_encode($headers, JSON_UNESCAPED_SLASHES | JSON_UNESCAPED_UNICODE);
             $ins = $pdo->prepare('INSERT INTO webhook_events (webhook_id, webhook_type, payload, raw_payload, source_ip, user_agent, headers, status, received_at, created_at, updated_at) VALUES (:id,:type,:pl,:raw,:ip,:ua,:hd,\'received\', NOW(), NOW(), NOW())');
-            $eventDbId = null;
+            $eventDbId = null; $receivedAt = date('Y-m-d H:i:s');
             try {
                 $ins->execute([':id'=>$webhookId, ':type'=>$type, ':pl'=>$payloadJson, ':raw'=>$rawPayload, ':ip'=>$ip, ':ua'=>$ua, ':hd'=>$headersJson]);
                 $eventDbId = (int)$pdo->lastInsertId();
             } catch (\Throwable $e) { /* ignore */ }
             try {
                 $endpointUrl = 'https://staff.vapeshed.co.nz/assets/services/queue/public/webhook.php';
-                $upd = $pdo->prepare("UPDATE webhook_subscriptions SET events_received_today = IF(DATE(IFNULL(last_event_received, NOW()))=CURRENT_DATE, events_received_today+1, 1), events_received_total = events_received_total+1, last_event_received=NOW(), updated_at=NOW(), health_status='healthy', health_message=NULL WHERE is_active=1 AND source_system='vend' AND (event_type = :t OR :t LIKE REPLACE(event_type,'*','%')) AND endpoint_url=:u");
-                $upd->execute([':t'=>$type, ':u'=>$endpointUrl]);
+                $upd = $pdo->prepare("UPDATE webhook_subscriptions SET events_received_today = IF(DATE(IFNULL(last_event_received, NOW()))=CURRENT_DATE, events_received_today+1, 1), events_received_total = events_received_total+1, last_event_received=NOW(), updated_at=NOW(), health_status='healthy', health_message=NULL WHERE is_active=1 AND source_system='vend' AND (event_type = :t OR :t2 LIKE REPLACE(event_type,'*','%')) AND endpoint_url=:u");
+                $upd->execute([':t'=>$type, ':t2'=>$type, ':u'=>$endpointUrl]);
             } catch (\Throwable $e) {}
             try {
                 $stmt = $pdo->prepare("INSERT INTO webhook_stats (recorded_at, webhook_type, metric_name, metric_value, time_period) VALUES (FROM_UNIXTIME(UNIX_TIMESTAMP() - MOD(UNIX_TIMESTAMP(),60)), :t, 'received_count', 1, '1min') ON DUPLICATE KEY UPDATE metric_value = metric_value + 1");
@@ -840,8 +893,8 @@ final class Web
                         $upd = $pdo->prepare("UPDATE webhook_events SET status='processing', queue_job_id=:jid, updated_at=NOW() WHERE webhook_id=:wid");
                         $upd->execute([':jid' => (string)$jobId, ':wid' => $webhookId]);
                     } catch (\Throwable $e) { /* ignore */ }
-                    // Optional: auto-kick a background worker to process webhook jobs immediately
-                    self::kickRunnerIfNeeded('webhook.event');
+                    // Optional: auto-kick a background worker once the ack has been sent (see below)
+                    $kickAfterAck = true;
                 }
             } catch (\Throwable $e) { /* ignore enqueue errors */ }
 
@@ -851,16 +904,24 @@ final class Web
                     // Determine effective event type and payload as Runner would
                     $pdo = PdoConnection::instance();
                     $etype = $type !== '' ? $type : 'vend.webhook';
-                    $row = null; $recvTs = null;
-                    try {
-                        $st = $pdo->prepare('SELECT webhook_type, payload, received_at FROM webhook_events WHERE webhook_id = :wid LIMIT 1');
-                        $st->execute([':wid' => $webhookId]);
-                        $row = $st->fetch(\PDO::FETCH_ASSOC) ?: null;
-                    } catch (\Throwable $e) { /* swallow */ }
+                    $row = null; $recvTs = null; $eventPayload = null;
+                    if ($eventDbId) {
+                        // Fresh insert: the row holds exactly what was just written, so reuse the decoded
+                        // payload instead of re-reading it and paying a second json_decode
+                        $row = ['webhook_type' => $type, 'received_at' => $receivedAt];
+                        $eventPayload = $in;
+                    } else {
+                        try {
+                            $st = $pdo->prepare('SELECT webhook_type, payload, received_at FROM webhook_events WHERE webhook_id = :wid LIMIT 1');
+                            $st->execute([':wid' => $webhookId]);
+                            $row = $st->fetch(\PDO::FETCH_ASSOC) ?: null;
+                        } catch (\Throwable $e) { /* swallow */ }
+                    }
                     if ($row) {
                         $etype = $etype !== '' ? $etype : (string)($row['webhook_type'] ?? $etype);
-                        $eventPayload = [];
-                        try { $eventPayload = json_decode((string)($row['payload'] ?? ''), true, 512, JSON_THROW_ON_ERROR); } catch (\Throwable $e) { $eventPayload = []; }
+                        if ($eventPayload === null) {
+                            try { $eventPayload = json_decode((string)($row['payload'] ?? ''), true, 512, JSON_THROW_ON_ERROR); } catch (\Throwable $e) { $eventPayload = []; }
+                        }
                         // Fan-out routing (match Runner mapping) if enabled
                         if (\Queue\Config::getBool('webhook.fanout.enabled', true)) {
                             $routes = [
@@ -915,9 +976,15 @@ final class Web
             header('Content-Type: text/plain; charset=utf-8');
             http_response_code(204);
             echo '';
-            return;
+        } else {
+            Http::respond(true, ['received' => true, 'type' => $type]);
+        }
+        // The runner spawn does not affect the response: flush the ack to Lightspeed first (FPM),
+        // then kick, so delivery latency no longer includes the lock probe and process fork.
+        if ($kickAfterAck) {
+            if (function_exists('fastcgi_finish_request')) { try { fastcgi_finish_request(); } catch (\Throwable $e) {} }
+            self::kickRunnerIfNeeded('webhook.event');
         }
-        Http::respond(true, ['received' => true, 'type' => $type]);
     }
 
     /** Metrics: Prometheus-style text output with guards */
@@ -1048,11 +1115,14 @@ final class Web
                 $hasJobs = (bool)$pdo->query("SHOW TABLES LIKE 'ls_jobs'")->fetchColumn();
                 if ($hasJobs) {
                     // Processing duration: started_at -> finished_at when status='done' (if available), fallback to started_at->NOW() for working
-                    $rows = $pdo->query("SELECT TIMESTAMPDIFF(SECOND, started_at, IFNULL(finished_at, NOW())) AS s FROM ls_jobs WHERE started_at IS NOT NULL AND updated_at >= DATE_SUB(NOW(), INTERVAL 1 DAY) LIMIT 5000")->fetchAll(\PDO::FETCH_COLUMN) ?: [];
+                    // Bucket in SQL over the same 5000-row sample: one aggregate row instead of 5000 fetched values
                     $buckets = [1,5,30,120,600,3600];
-                    $counts = array_fill_keys(array_map('strval', $buckets + [PHP_INT_MAX]), 0);
-                    foreach ($rows as $s) { $sec = max(0, (int)$s); $le = 'inf'; foreach ($buckets as $th) { if ($sec <= $th) { $le = (string)$th; break; } } $counts[$le] = ($counts[$le] ?? 0) + 1; }
-                    $cum = 0; foreach (array_map('strval', $buckets) + ['inf'] as $le) { $cum += (int)($counts[$le] ?? 0); echo "ls_job_processing_duration_bucket_seconds{le=\"$le\"} $cum\n"; }
+                    $cols = [];
+                    foreach ($buckets as $th) { $cols[] = "SUM(d.s <= {$th}) AS `le_{$th}`"; }
+                    $agg = $pdo->query("SELECT " . implode(', ', $cols) . ", COUNT(*) AS `le_inf`
+                                        FROM (SELECT GREATEST(0, TIMESTAMPDIFF(SECOND, started_at, IFNULL(finished_at, NOW()))) AS s
+                                              FROM ls_jobs WHERE started_at IS NOT NULL AND updated_at >= DATE_SUB(NOW(), INTERVAL 1 DAY) LIMIT 5000) d")->fetch(\PDO::FETCH_ASSOC) ?: [];
+                    foreach (array_merge(array_map('strval', $buckets), ['inf']) as $le) { $cum = (int)($agg['le_' . $le] ?? 0); echo "ls_job_processing_duration_bucket_seconds{le=\"$le\"} $cum\n"; }
                 }
             } catch (\Throwable $e) {}
         } catch (\Throwable $e) { echo "ls_metrics_error 1\n"; }
@@ -1408,7 +1478,7 @@ final class Web
             if ($hasTransfersTbl && ($hasLegacyTransfers || $hasLegacyItems)) {
                 // Check if destination transfers has any rows; if empty, or explicitly asked via param force_legacy=1, seed from legacy
                 $forceLegacy = (bool)($in['force_legacy'] ?? ($in['legacy'] ?? false));
-                $destCount = 0; try { $destCount = (int)$pdo->query('SELECT COUNT(*) FROM transfers')->fetchColumn(); } catch (\Throwable $e) {}
+                $destCount = 0; try { $destCount = (int)$pdo->query('SELECT EXISTS(SELECT 1 FROM transfers)')->fetchColumn(); } catch (\Throwable $e) {}
                 if ($forceLegacy || $destCount === 0) {
                     // Backfill transfers from stock_transfers
                     if ($hasLegacyTransfers) {
@@ -9,19 +9,48 @@ namespace Queue;
  */
 final class Logger
 {
+    /** Meta keys containing any of these (case-insensitive) are redacted; one compiled pattern. */
+    private const SENSITIVE_RE = '/access_token|refresh_token|authorization|password|secret/i';
+
+    /** @var array<string,bool> meta key => redact? (log call sites use a small, fixed key vocabulary) */
+    private static array $sensitiveKeys = [];
+
+    /** @var int second the cached ISO timestamp was formatted for */
+    private static int $tsAt = 0;
+    /** @var string cached date('c') for $tsAt */
+    private static string $ts = '';
+
+    /** @var resource|false|null log stream, opened once per process (false: could not be opened) */
+    private static $sink = null;
+
+    /** STDERR is only predefined under the CLI SAPI; web requests open php://stderr (once) instead. */
+    private static function sink()
+    {
+        if (self::$sink === null) { self::$sink = \defined('STDERR') ? STDERR : fopen('php://stderr', 'wb'); }
+        return self::$sink;
+    }
+
+    /** ISO-8601 timestamp, formatted at most once per second (bursts of log lines share it). */
+    private static function ts(): string
+    {
+        $now = time();
+        if ($now !== self::$tsAt) { self::$tsAt = $now; self::$ts = date('c', $now); }
+        return self::$ts;
+    }
+
     public static function log(string $level, string $message, array $context = []): void
     {
-        $redact = static function ($k, $v) {
-            $sensitive = ['access_token','refresh_token','authorization','password','secret'];
-            foreach ($sensitive as $needle) {
-                if (stripos((string)$k, $needle) !== false) return '***';
-            }
-            return $v;
-        };
         $meta = $context['meta'] ?? [];
-        foreach ($meta as $k => $v) $meta[$k] = $redact($k, $v);
+        foreach ($meta as $k => $v) {
+            $k = (string)$k;
+            if (!isset(self::$sensitiveKeys[$k])) {
+                if (count(self::$sensitiveKeys) >= 512) { self::$sensitiveKeys = []; }
+                self::$sensitiveKeys[$k] = (bool)preg_match(self::SENSITIVE_RE, $k);
+            }
+            if (self::$sensitiveKeys[$k]) $meta[$k] = '***';
+        }
         $record = [
-            'ts' => date('c'),
+            'ts' => self::ts(),
             'level' => $level,
             'request_id' => $context['request_id'] ?? ($_SERVER['HTTP_X_REQUEST_ID'] ?? null),
             'job_id' => $context['job_id'] ?? null,
@@ -29,8 +58,26 @@ final class Logger
             'message' => $message,
             'meta' => $meta,
         ];
-        fwrite(STDERR, json_encode($record, JSON_UNESCAPED_SLASHES) . "\n");
+        // Raw UTF-8 output is shorter than \uXXXX escapes; substitute bad bytes rather than lose the line
+        $line = json_encode($record, JSON_UNESCAPED_SLASHES | JSON_UNESCAPED_UNICODE | JSON_INVALID_UTF8_SUBSTITUTE);
+        if ($line === false) { $line = '{"level":"error","message":"logger.encode_failed"}'; }
+        $sink = self::sink();
+        if ($sink) fwrite($sink, $line . "\n");
+    }
+    /** @var bool|null cached debug switch (env QUEUE_LOG_DEBUG or config queue.log.debug) */
+    private static ?bool $debug = null;
+
+    /** True when debug-level records should be emitted; resolved once per process. */
+    public static function debugEnabled(): bool
+    {
+        if (self::$debug !== null) return self::$debug;
+        $env = strtolower((string)(getenv('QUEUE_LOG_DEBUG') ?: ''));
+        if ($env !== '') { return self::$debug = in_array($env, ['1','true','yes','on'], true); }
+        try { self::$debug = Config::getBool('queue.log.debug', false); } catch (\Throwable $e) { self::$debug = false; }
+        return self::$debug;
     }
+    /** Debug record; callers on hot paths should check debugEnabled() before building context. */
+    public static function debug(string $m, array $c = []): void { if (self::debugEnabled()) self::log('debug', $m, $c); }
     public static function info(string $m, array $c = []): void { self::log('info', $m, $c); }
     public static function warn(string $m, array $c = []): void { self::log('warn', $m, $c); }
     public static function error(string $m, array $c = []): void { self::log('error', $m, $c); }
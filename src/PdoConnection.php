@@ -34,6 +34,9 @@ use PDOException;
  *       return 'ok';
  *   });
  *
+ *   // Hot-path statement prepared once per process
+ *   PdoConnection::prepared('UPDATE t SET seen_at = NOW() WHERE id = :id')->execute([':id' => 1]);
+ *
  *   // Advisory lock (best-effort)
  *   $out = PdoConnection::withAdvisoryLock('my-lock', 5, function(){
  *       // critical section
@@ -42,6 +45,8 @@ use PDOException;
  *
  * Environment variables (.env)
  *   Default: DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASS
+ *   Tuning:  DB_CONNECT_TIMEOUT (s, default 5), DB_PING_INTERVAL (s, default 300),
+ *            DB_PERSISTENT (default 1; set 0 behind a connection pooler such as ProxySQL/MaxScale)
  *   DB2:     DB2_HOST, DB2_PORT, DB2_NAME, DB2_USER, DB2_PASS (or VS_DB_*)
  *   DB3:     DB3_HOST, DB3_PORT, DB3_NAME, DB3_USER, DB3_PASS (or WIKI_DB_*)
  *
@@ -49,23 +54,33 @@ use PDOException;
  */
 final class PdoConnection
 {
-    private static ?PDO $pdo = null;
-    private static ?PDO $pdo2 = null;
-    private static ?PDO $pdo3 = null;
+    /** @var array<string,PDO> open connections keyed by logical name (default|db2|db3) */
+    private static array $connections = [];
+    /** @var array<string,string> slot => "host:port/dbname" the connection was opened against */
+    private static array $targets = [];
     private static bool $envLoaded = false;
     /** @var string|null Cached DB server version string (e.g., '10.5.21-MariaDB') */
     private static ?string $serverVersion = null;
     /** @var string|null Cached DB flavor ('mariadb' or 'mysql') */
     private static ?string $serverFlavor = null;
-    /** @var array<string,bool> */
+    /** @var array<string,bool> advisory locks taken and not yet released (released at shutdown if still held) */
     private static array $heldLocks = [];
+    private static bool $lockReaperRegistered = false;
+    /** @var array<string,array<string,\PDOStatement>> prepared statement cache: which => sql => statement */
+    private static array $stmtCache = [];
+
+    /** @var array<string,int> last liveness check per connection (unix seconds) */
+    private static array $checkedAt = [];
 
     public static function instance(string $which = 'default'): PDO
     {
-        // Return cached if exists
-        if ($which === 'default' && self::$pdo) return self::$pdo;
-        if ($which === 'db2' && self::$pdo2) return self::$pdo2;
-        if ($which === 'db3' && self::$pdo3) return self::$pdo3;
+        $which = self::slot($which);
+        // Return cached if exists (periodically pre-pinged; reconnect if the server dropped it)
+        $cached = self::$connections[$which] ?? null;
+        if ($cached) {
+            if (self::alive($which, $cached)) return $cached;
+            self::forget($which);
+        }
 
         // Best-effort .env loader (once per process). This allows ops to drop a .env file
         // in common locations without changing code or web server env. No secrets are stored
@@ -151,18 +166,26 @@ final class PdoConnection
         }
 
         $dsn = sprintf('mysql:host=%s;port=%s;dbname=%s;charset=utf8mb4', $host, $port, $db);
+        self::$targets[$which] = $host . ':' . $port . '/' . $db;
         $pdo = new PDO($dsn, $user, $pass, [
+            PDO::ATTR_TIMEOUT => (int)(getenv('DB_CONNECT_TIMEOUT') ?: 5),
             PDO::ATTR_ERRMODE => PDO::ERRMODE_EXCEPTION,
             PDO::ATTR_EMULATE_PREPARES => false,
-            PDO::ATTR_PERSISTENT => true,
+            // Persistent by default (one socket per FPM worker). Behind a pooler the proxy owns reuse and
+            // pinned persistent sockets only exhaust its backend slots.
+            PDO::ATTR_PERSISTENT => getenv('DB_PERSISTENT') !== '0',
             PDO::ATTR_DEFAULT_FETCH_MODE => PDO::FETCH_ASSOC,
+            // Ensure utf8mb4 everywhere (MariaDB 10.5 compatible). As an init command it runs once per physical
+            // connection: a reused persistent socket keeps its session charset, so requests skip the round-trip.
+            PDO::MYSQL_ATTR_INIT_COMMAND => 'SET NAMES utf8mb4 COLLATE utf8mb4_unicode_ci',
         ]);
-        // Ensure utf8mb4 everywhere (MariaDB 10.5 compatible)
-        $pdo->exec("SET NAMES utf8mb4 COLLATE utf8mb4_unicode_ci");
 
         // Record server version/flavor for observability and conditional behaviors
         try {
-            $v = (string)$pdo->query('SELECT VERSION()')->fetchColumn();
+            // Taken from the connect handshake rather than a SELECT VERSION() round-trip on every request
+            // (MariaDB advertises a "5.5.5-" compatibility prefix there)
+            $v = (string)$pdo->getAttribute(PDO::ATTR_SERVER_VERSION);
+            if (strncmp($v, '5.5.5-', 6) === 0) { $v = substr($v, 6); }
             self::$serverVersion = $v;
             self::$serverFlavor = (stripos($v, 'mariadb') !== false) ? 'mariadb' : 'mysql';
             // Optional: session tweaks safe for MariaDB 10.5
@@ -173,9 +196,71 @@ final class PdoConnection
         } catch (\Throwable $e) {
             // Non-fatal: leave server info unknown
         }
-        if ($which === 'db2') { self::$pdo2 = $pdo; return self::$pdo2; }
-        if ($which === 'db3') { self::$pdo3 = $pdo; return self::$pdo3; }
-        self::$pdo = $pdo; return self::$pdo;
+        self::$checkedAt[$which] = time();
+        return self::$connections[$which] = $pdo;
+    }
+
+    /**
+     * Cheap pre-ping, at most once per DB_PING_INTERVAL seconds (default 300) and never
+     * inside a transaction. Long-running workers otherwise discover a server-closed
+     * persistent connection (wait_timeout) as a failed query.
+     */
+    private static function alive(string $which, PDO $pdo): bool
+    {
+        $now = time();
+        $interval = (int)(getenv('DB_PING_INTERVAL') ?: 300);
+        if ($now - (self::$checkedAt[$which] ?? $now) < $interval) return true;
+        self::$checkedAt[$which] = $now;
+        try {
+            if ($pdo->inTransaction()) return true;
+            $pdo->query('SELECT 1');
+            return true;
+        } catch (\Throwable $e) {
+            return false;
+        }
+    }
+
+    /**
+     * "host:port/dbname" behind a connection, for namespacing shared caches (APCu is per FPM pool, not per
+     * database). Connects if needed.
+     */
+    public static function target(string $which = 'default'): string
+    {
+        $which = self::slot($which);
+        if (!isset(self::$targets[$which])) { self::instance($which); }
+        return self::$targets[$which] ?? '';
+    }
+
+    /** Unknown names share the default connection (they always resolved to the default credentials). */
+    private static function slot(string $which): string
+    {
+        return ($which === 'db2' || $which === 'db3') ? $which : 'default';
+    }
+
+    /** Drop a cached connection and its prepared statements so the next instance() reconnects. */
+    public static function forget(string $which = 'default'): void
+    {
+        $which = self::slot($which);
+        unset(self::$connections[$which]);
+        unset(self::$checkedAt[$which]);
+        unset(self::$stmtCache[$which]);
+    }
+
+    /**
+     * Prepare once per process and reuse the statement handle.
+     * With native prepares every prepare() is a server round-trip, so hot-path
+     * statements with constant SQL (heartbeats, log inserts, metric bumps) should
+     * go through here. Do not use for SQL built from variable-length IN lists.
+     */
+    public static function prepared(string $sql, string $which = 'default'): \PDOStatement
+    {
+        // Same slot key as instance()/forget(), so forget() drops statements cached under any alias
+        $which = self::slot($which);
+        // Two-level lookup instead of a concatenated "which|sql" key: SQL literals are interned, so their
+        // hash is computed once and no per-call string is built from the (often long) statement text.
+        if (isset(self::$stmtCache[$which][$sql])) return self::$stmtCache[$which][$sql];
+        if (count(self::$stmtCache[$which] ?? []) >= 128) { self::$stmtCache[$which] = []; }
+        return self::$stmtCache[$which][$sql] = self::instance($which)->prepare($sql);
     }
 
     /**
@@ -199,7 +284,7 @@ final class PdoConnection
             if ($pdo->inTransaction()) $pdo->rollBack();
             $sqlState = $e->errorInfo[0] ?? null; $code = $e->getCode();
             if ($attempt < $max && ($sqlState === '40001' || $code === '1213')) {
-                usleep(min(250 * $attempt + random_int(0, 250), 1200) * 1000);
+                usleep(min(250 * $attempt + mt_rand(0, 250), 1200) * 1000);
                 goto begin;
             }
             throw $e;
@@ -227,15 +312,39 @@ final class PdoConnection
         } catch (\Throwable $e) {
             // Ignore lock errors; proceed without lock
         }
+        if ($locked) { self::trackLock($name, true); }
         try {
             return $fn();
         } finally {
             if ($locked) {
                 try { $pdo->prepare('SELECT RELEASE_LOCK(:n)')->execute([':n' => $name]); } catch (\Throwable $e) {}
+                self::trackLock($name, false);
             }
         }
     }
 
+    /**
+     * Record an advisory lock as held (or released). Locks belong to the session, and with persistent
+     * connections the session outlives the request: a fatal error or max_execution_time abort skips
+     * `finally`, so anything still recorded here is released from a shutdown function instead of
+     * staying held until that worker's connection dies.
+     */
+    public static function trackLock(string $name, bool $held): void
+    {
+        if (!$held) { unset(self::$heldLocks[$name]); return; }
+        self::$heldLocks[$name] = true;
+        if (self::$lockReaperRegistered) return;
+        self::$lockReaperRegistered = true;
+        register_shutdown_function(static function (): void {
+            $pdo = self::$connections['default'] ?? null;
+            if (!self::$heldLocks || !$pdo) return;
+            foreach (array_keys(self::$heldLocks) as $n) {
+                try { $pdo->prepare('SELECT RELEASE_LOCK(:n)')->execute([':n' => $n]); } catch (\Throwable $e) {}
+            }
+            self::$heldLocks = [];
+        });
+    }
+
     /**
      * Return database server info detected at first connection.
      * @return array{version: string|null, flavor: string|null}
@@ -243,7 +352,7 @@ final class PdoConnection
     public static function serverInfo(): array
     {
         // Initialize if not yet connected
-        try { if (!self::$pdo) { self::instance(); } } catch (\Throwable $e) { /* ignore */ }
+        try { if (!isset(self::$connections['default'])) { self::instance(); } } catch (\Throwable $e) { /* ignore */ }
         return [
             'version' => self::$serverVersion,
             'flavor'  => self::$serverFlavor,
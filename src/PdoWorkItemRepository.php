@@ -32,10 +32,43 @@ final class PdoWorkItemRepository
     /** Cached detected schema capabilities */
     private static array $schema;
 
+    /** Accepted log levels (lower-case input => stored level); anything else is logged as info */
+    private const LOG_LEVELS = ['debug' => 'debug', 'info' => 'info', 'warn' => 'warning', 'warning' => 'warning', 'error' => 'error'];
+
+    /** APCu key/TTL for sharing detected capabilities across FPM requests (schema only changes on migration) */
+    private const SCHEMA_CACHE_KEY = 'cishub:ls_jobs:schema';
+    private const SCHEMA_CACHE_TTL = 300;
+
+    /** @var array<int,string> legacy numeric id => ls_jobs.job_id (ls_jobs_map rows never change once assigned) */
+    private static array $legacyJobIds = [];
+
+    /** Resolve a legacy mapped id to its job_id, memoised so claim/log/complete/fail for one job share one lookup. */
+    private static function legacyJobId(PDO $pdo, int $id): string
+    {
+        if (isset(self::$legacyJobIds[$id])) return self::$legacyJobIds[$id];
+        $sel = $pdo->prepare('SELECT job_id FROM ls_jobs_map WHERE id = :i LIMIT 1');
+        $sel->execute([':i' => $id]);
+        $jobId = (string)($sel->fetchColumn() ?: '');
+        if ($jobId !== '') { self::rememberLegacyJobId($id, $jobId); }
+        return $jobId;
+    }
+
+    private static function rememberLegacyJobId(int $id, string $jobId): void
+    {
+        if (count(self::$legacyJobIds) >= 1024) { self::$legacyJobIds = []; }
+        self::$legacyJobIds[$id] = $jobId;
+    }
+
     /** One-time detection of table/column capabilities (cached) */
     private static function detectSchema(PDO $pdo): void
     {
         if (isset(self::$schema)) return;
+        if (function_exists('apcu_fetch')) {
+            // Keyed by DB target: deployments sharing an FPM pool (one APCu segment) must not read each other's schema
+            $cacheKey = self::SCHEMA_CACHE_KEY . ':' . PdoConnection::target();
+            $hit = apcu_fetch($cacheKey, $found);
+            if ($found && is_array($hit)) { self::$schema = $hit; return; }
+        }
 
         $cols = $pdo->query('SHOW COLUMNS FROM ls_jobs')->fetchAll(PDO::FETCH_ASSOC) ?: [];
         $names = array_map(static fn($r) => (string)$r['Field'], $cols);
@@ -91,6 +124,7 @@ final class PdoWorkItemRepository
             );
             self::$schema['legacy_map'] = true;
         }
+        if (isset($cacheKey)) { apcu_store($cacheKey, self::$schema, self::SCHEMA_CACHE_TTL); }
     }
 
     /** RFC4122-ish UUID v4 for legacy job_id/log_id */
@@ -99,12 +133,8 @@ final class PdoWorkItemRepository
         $d = random_bytes(16);
         $d[6] = chr((ord($d[6]) & 0x0f) | 0x40);
         $d[8] = chr((ord($d[8]) & 0x3f) | 0x80);
-        $hex = bin2hex($d);
-        return sprintf('%s-%s-%s-%s-%s',
-            substr($hex, 0, 8), substr($hex, 8, 4),
-            substr($hex, 12, 4), substr($hex, 16, 4),
-            substr($hex, 20)
-        );
+        // One split + format call instead of five substr() copies
+        return vsprintf('%s%s-%s-%s-%s-%s%s%s', str_split(bin2hex($d), 4));
     }
 
     /** Safe JSON encode for payload/meta */
@@ -132,6 +162,7 @@ final class PdoWorkItemRepository
                     $st->execute([':lk' => $lockKey]);
                     $row = $st->fetch(PDO::FETCH_ASSOC);
                     $gotLock = $row && (int)$row['got'] === 1;
+                    if ($gotLock) { PdoConnection::trackLock($lockKey, true); }
                 } catch (\Throwable $e) { /* best-effort */ }
             }
 
@@ -148,12 +179,11 @@ final class PdoWorkItemRepository
                         $s->execute([':k' => $idempotencyKey]);
                         $jid = (string)($s->fetchColumn() ?: '');
                         if ($jid !== '') {
-                            // Ensure numeric map exists
-                            $pdo->prepare('INSERT IGNORE INTO ls_jobs_map(job_id) VALUES(:j)')->execute([':j' => $jid]);
-                            $sel = $pdo->prepare('SELECT id FROM ls_jobs_map WHERE job_id = :j LIMIT 1');
-                            $sel->execute([':j' => $jid]);
-                            $mid = (int)($sel->fetchColumn() ?: 0);
-                            if ($mid > 0) return $mid;
+                            // Ensure numeric map exists; id = LAST_INSERT_ID(id) hands back the existing id on a
+                            // duplicate, so there is no read-back SELECT
+                            $pdo->prepare('INSERT INTO ls_jobs_map(job_id) VALUES(:j) ON DUPLICATE KEY UPDATE id = LAST_INSERT_ID(id)')->execute([':j' => $jid]);
+                            $mid = (int)$pdo->lastInsertId();
+                            if ($mid > 0) { self::rememberLegacyJobId($mid, $jid); return $mid; }
                         }
                     }
                 }
@@ -192,18 +222,20 @@ final class PdoWorkItemRepository
                 ]);
 
                 $pdo->prepare('INSERT INTO ls_jobs_map(job_id) VALUES(:j)
-                               ON DUPLICATE KEY UPDATE job_id = VALUES(job_id)')
+                               ON DUPLICATE KEY UPDATE id = LAST_INSERT_ID(id)')
                     ->execute([':j' => $jobId]);
 
                 $id = (int)$pdo->lastInsertId();
                 if ($id === 0) {
                     $id = (int)$pdo->query("SELECT id FROM ls_jobs_map WHERE job_id = '" . str_replace("'", "''", $jobId) . "'")->fetchColumn();
                 }
+                if ($id > 0) { self::rememberLegacyJobId($id, $jobId); }
                 self::log($pdo, $id, 'info', 'job.created', $trace);
                 return $id;
             } finally {
                 if ($idempotencyKey && $gotLock && $lockKey) {
                     try { $pdo->prepare('SELECT RELEASE_LOCK(:lk)')->execute([':lk' => $lockKey]); } catch (\Throwable $e) {}
+                    PdoConnection::trackLock($lockKey, false);
                 }
             }
         });
@@ -222,7 +254,7 @@ final class PdoWorkItemRepository
                        (self::$schema['has_updated']   ? "updated_at = NOW()," : "") .
                        " status = status
                         WHERE id = :id AND status = :st";
-                $pdo->prepare($sql)->execute([':id'=>$id, ':st'=>self::$schema['status_working']]);
+                PdoConnection::prepared($sql)->execute([':id'=>$id, ':st'=>self::$schema['status_working']]);
             }
         });
     }
@@ -277,32 +309,23 @@ final class PdoWorkItemRepository
                             " WHERE id IN($place)";
                     $pdo->prepare($sql)->execute($ids);
 
-                    // Log claims
-                    foreach ($ids as $nid) {
-                        $trace = null;
-                        try {
-                            $s = $pdo->prepare('SELECT payload FROM ls_jobs WHERE id = :i');
-                            $s->execute([':i' => $nid]);
-                            $p = json_decode((string)($s->fetchColumn() ?: ''), true) ?: [];
-                            if (isset($p['trace_id']) && is_string($p['trace_id'])) $trace = (string)$p['trace_id'];
-                        } catch (\Throwable $e) {}
-                        self::log($pdo, $nid, 'info', 'job.claimed', $trace ?? Http::requestId());
-                    }
                 }
 
-                // Normalize rows to WorkItem[]
-                $out = [];
+                // Normalize rows to WorkItem[] and log claims in one write (payload is already in hand)
+                $out = []; $claimLogs = [];
                 foreach ($rows as $r) {
-                    $j = new WorkItem();
-                    $j->id          = (int)$r['id'];
-                    $j->type        = (string)$r['type'];
-                    $j->payload     = json_decode((string)$r['payload'], true) ?: [];
-                    $j->status      = self::$schema['status_working'];
-                    $j->attempts    = (int)$r['attempts'];
-                    $j->started_at  = null;
-                    $j->finished_at = null;
+                    $j = new WorkItem(
+                        (int)$r['id'],
+                        (string)$r['type'],
+                        json_decode((string)$r['payload'], true) ?: [],
+                        self::$schema['status_working'],
+                        (int)$r['attempts']
+                    );
                     $out[] = $j;
+                    $trace = (isset($j->payload['trace_id']) && is_string($j->payload['trace_id'])) ? $j->payload['trace_id'] : null;
+                    $claimLogs[] = [$j->id, 'job.claimed', $trace ?? Http::requestId()];
                 }
+                self::logMany($pdo, 'info', $claimLogs);
                 return $out;
             }
 
@@ -317,7 +340,7 @@ final class PdoWorkItemRepository
                 $map->execute($jobIds);
                 $mRows = $map->fetchAll(PDO::FETCH_ASSOC) ?: [];
                 $toId = [];
-                foreach ($mRows as $mr) $toId[(string)$mr['job_id']] = (int)$mr['id'];
+                foreach ($mRows as $mr) { $toId[(string)$mr['job_id']] = (int)$mr['id']; self::rememberLegacyJobId((int)$mr['id'], (string)$mr['job_id']); }
 
                 // mark running
                 $pdo->prepare(
@@ -330,14 +353,13 @@ final class PdoWorkItemRepository
                     $jid = (string)$r['job_id'];
                     $nid = $toId[$jid] ?? 0;
                     if ($nid > 0) {
-                        $j = new WorkItem();
-                        $j->id          = $nid;
-                        $j->type        = (string)$r['type'];
-                        $j->payload     = json_decode((string)$r['payload'], true) ?: [];
-                        $j->status      = self::$schema['status_working'];
-                        $j->attempts    = (int)$r['attempts'];
-                        $j->started_at  = null;
-                        $j->finished_at = null;
+                        $j = new WorkItem(
+                            $nid,
+                            (string)$r['type'],
+                            json_decode((string)$r['payload'], true) ?: [],
+                            self::$schema['status_working'],
+                            (int)$r['attempts']
+                        );
                         $out[] = $j;
 
                         self::log($pdo, $nid, 'info', 'job.claimed', $j->payload['trace_id'] ?? Http::requestId());
@@ -411,7 +433,8 @@ final class PdoWorkItemRepository
     private static function trySelect(PDO $pdo, string $sql, ?string $type, int $limit): array
     {
         try {
-            $st = $pdo->prepare($sql);
+            // Claim SQL is fixed per schema/type-filter shape, so the handle is reused every loop
+            $st = PdoConnection::prepared($sql);
             if ($type) $st->bindValue(':type', $type, PDO::PARAM_STR);
             $st->bindValue(':lim', $limit, PDO::PARAM_INT);
             $st->execute();
@@ -433,12 +456,10 @@ final class PdoWorkItemRepository
                         (self::$schema['has_finished_at'] ? ", finished_at = NOW()" : "") .
                         (self::$schema['has_updated']     ? ", updated_at = NOW()" : "") .
                         " WHERE id = :id";
-                $pdo->prepare($sql)->execute([':id' => $id]);
+                PdoConnection::prepared($sql)->execute([':id' => $id]);
             } else {
                 // find legacy job_id
-                $sel = $pdo->prepare('SELECT job_id FROM ls_jobs_map WHERE id = :i LIMIT 1');
-                $sel->execute([':i' => $id]);
-                $jobId = (string)($sel->fetchColumn() ?: '');
+                $jobId = self::legacyJobId($pdo, $id);
                 if ($jobId !== '') {
                     $sql = "UPDATE ls_jobs
                             SET status = '" . self::$schema['status_done'] . "'" .
@@ -453,9 +474,10 @@ final class PdoWorkItemRepository
             $cid = null;
             try {
                 if (!self::$schema['legacy']) {
-                    $s = $pdo->prepare('SELECT payload FROM ls_jobs WHERE id = :i');
+                    $s = PdoConnection::prepared('SELECT payload FROM ls_jobs WHERE id = :i');
                     $s->execute([':i' => $id]);
                     $p = json_decode((string)($s->fetchColumn() ?: ''), true) ?: [];
+                    $s->closeCursor();
                     if (isset($p['trace_id']) && is_string($p['trace_id'])) $cid = (string)$p['trace_id'];
                 }
             } catch (\Throwable $e) {}
@@ -463,9 +485,34 @@ final class PdoWorkItemRepository
         });
     }
 
+    /**
+     * Hand claimed-but-unstarted jobs back to pending (runner stopping mid-batch) without counting an
+     * attempt, so they are picked up by the next runner instead of waiting out the reaper's stale window.
+     * @param int[] $ids
+     */
+    public static function release(array $ids): void
+    {
+        $ids = array_values(array_filter(array_map('intval', $ids), static fn($i) => $i > 0));
+        if (!$ids) return;
+        $pdo = PdoConnection::instance();
+        self::detectSchema($pdo);
+        $set = "status = 'pending'" .
+            (self::$schema['has_lease']   ? ", leased_until = NULL" : "") .
+            (self::$schema['has_updated'] ? ", updated_at = NOW()" : "");
+        $keys = $ids; $col = 'id';
+        if (self::$schema['legacy']) {
+            $keys = []; $col = 'job_id';
+            foreach ($ids as $id) { $jid = self::legacyJobId($pdo, $id); if ($jid !== '') $keys[] = $jid; }
+            if (!$keys) return;
+        }
+        $place = implode(',', array_fill(0, count($keys), '?'));
+        $pdo->prepare("UPDATE ls_jobs SET $set WHERE $col IN ($place) AND status = ?")
+            ->execute(array_merge($keys, [self::$schema['status_working']]));
+    }
+
     /**
      * Mark job as failed or reschedule with backoff.
-     * - Exponential backoff with jitter
+     * - Exponential backoff with full jitter (see retryDelaySeconds)
      * - Writes last_error when column exists
      * - On final failure mirrors to ls_jobs_dlq in both schemas
      */
@@ -477,12 +524,13 @@ final class PdoWorkItemRepository
             // Current attempts
             $attempts = 0;
             if (!self::$schema['legacy']) {
-                $row = $pdo->query('SELECT attempts FROM ls_jobs WHERE id = ' . (int)$id)->fetch(PDO::FETCH_ASSOC);
-                $attempts = $row ? ((int)$row['attempts'] + 1) : 1;
+                // Atomic bump that hands back the new value in the OK packet (MySQL's UPDATE ... RETURNING):
+                // LAST_INSERT_ID(expr) is reported via lastInsertId() without a follow-up SELECT.
+                $bump = PdoConnection::prepared('UPDATE ls_jobs SET attempts = LAST_INSERT_ID(attempts + 1) WHERE id = :id');
+                $bump->execute([':id' => $id]);
+                $attempts = $bump->rowCount() > 0 ? max(1, (int)$pdo->lastInsertId()) : 1;
             } else {
-                $sel = $pdo->prepare('SELECT job_id FROM ls_jobs_map WHERE id = :i');
-                $sel->execute([':i' => $id]);
-                $jobId = (string)($sel->fetchColumn() ?: '');
+                $jobId = self::legacyJobId($pdo, $id);
                 if ($jobId !== '') {
                     $row = $pdo->prepare('SELECT attempts FROM ls_jobs WHERE job_id = :j');
                     $row->execute([':j' => $jobId]);
@@ -546,26 +594,23 @@ final class PdoWorkItemRepository
             }
 
             // RESCHEDULE with backoff
-            $backoffMin = (int)max(1, pow(2, $attempts));  // 2,4,8..
-            $jitterSec  = random_int(0, 30);
-            $params     = [':a' => $attempts, ':id' => $id];
+            $delaySec = self::retryDelaySeconds($attempts);
+            $params   = [':a' => $attempts, ':id' => $id];
 
             if (!self::$schema['legacy']) {
                 $sql = "UPDATE ls_jobs
                         SET attempts = :a,
                             status   = 'pending' " .
                            (self::$schema['has_last_error'] ? ", last_error = :e" : "") .
-                           (self::$schema['has_next_run_at'] ? ", next_run_at = DATE_ADD(NOW(), INTERVAL :mins MINUTE) + INTERVAL :jit SECOND" : "") .
+                           (self::$schema['has_next_run_at'] ? ", next_run_at = DATE_ADD(NOW(), INTERVAL :delay SECOND)" : "") .
                            (self::$schema['has_updated']     ? ", updated_at = NOW()" : "") .
                         " WHERE id = :id";
                 if (self::$schema['has_last_error'])  $params[':e']   = $error;
-                if (self::$schema['has_next_run_at']) { $params[':mins'] = $backoffMin; $params[':jit'] = $jitterSec; }
+                if (self::$schema['has_next_run_at']) { $params[':delay'] = $delaySec; }
                 $pdo->prepare($sql)->execute($params);
             } else {
                 // legacy: no next_run_at; just flip to pending and rely on external pacing
-                $sel = $pdo->prepare('SELECT job_id FROM ls_jobs_map WHERE id = :i');
-                $sel->execute([':i' => $id]);
-                $jobId = (string)($sel->fetchColumn() ?: '');
+                $jobId = self::legacyJobId($pdo, $id);
                 if ($jobId !== '') {
                     $sql = "UPDATE ls_jobs
                             SET attempts = :a, status = 'pending' " .
@@ -579,19 +624,59 @@ final class PdoWorkItemRepository
         });
     }
 
+    /**
+     * Retry delay in seconds: base * 2^(attempt-1), capped, with full jitter.
+     * Jitter spreads retries across the whole window so a shared upstream
+     * outage does not reschedule every failed job onto the same second.
+     */
+    private static function retryDelaySeconds(int $attempts): int
+    {
+        $base = max(1, (int)(Config::get('vend.retry_backoff_base_s', 60) ?? 60));
+        $cap  = max($base, (int)(Config::get('vend.retry_backoff_max_s', 3600) ?? 3600));
+        $exp  = min(30, max(0, $attempts - 1));
+        $ceil = (int)min($cap, $base * (2 ** $exp)); // 60,120,240..
+        if (!Config::getBool('vend.retry_jitter', true)) { return $ceil; }
+        // Scheduling jitter, not a secret: the userspace Mersenne Twister avoids a CSPRNG read per failure
+        return mt_rand(1, max(1, $ceil));
+    }
+
+    /**
+     * Write several log rows with a single multi-row INSERT (modern schema).
+     * Falls back to per-row log() when the batch shape is not supported.
+     * @param array<int, array{0:int,1:string,2:?string}> $entries [jobId, message, correlationId]
+     */
+    private static function logMany(PDO $pdo, string $level, array $entries): void
+    {
+        if (!$entries) return;
+        if (count($entries) > 1 && !self::$schema['legacy']) {
+            $lvl = self::LOG_LEVELS[strtolower($level)] ?? 'info';
+            $vals = []; $params = [];
+            foreach ($entries as [$jobId, $message, $cid]) {
+                $vals[] = '(?,?,?,?)';
+                array_push($params, $jobId, $lvl, $message, $cid);
+            }
+            try {
+                $pdo->prepare('INSERT INTO ls_job_logs (job_id, level, message, correlation_id) VALUES ' . implode(',', $vals))
+                    ->execute($params);
+                return;
+            } catch (\Throwable $e) { /* fall through to per-row writer */ }
+        }
+        foreach ($entries as [$jobId, $message, $cid]) {
+            self::log($pdo, (int)$jobId, $level, (string)$message, $cid);
+        }
+    }
+
     /**
      * Write a log row resiliently across schema variants.
      * Normalizes level to one of: debug|info|warning|error.
      */
     private static function log(PDO $pdo, int $jobId, string $level, string $message, ?string $correlationId = null): void
     {
-        $lvl = strtolower($level);
-        if ($lvl === 'warn') $lvl = 'warning';
-        if (!in_array($lvl, ['debug','info','warning','error'], true)) $lvl = 'info';
+        $lvl = self::LOG_LEVELS[strtolower($level)] ?? 'info';
 
         // Modern
         try {
-            $pdo->prepare('INSERT INTO ls_job_logs (job_id, level, message, correlation_id) VALUES (:j,:l,:m,:c)')
+            PdoConnection::prepared('INSERT INTO ls_job_logs (job_id, level, message, correlation_id) VALUES (:j,:l,:m,:c)')
                 ->execute([
                     ':j' => $jobId,
                     ':l' => $lvl,
@@ -616,9 +701,7 @@ final class PdoWorkItemRepository
 
         // Legacy: map numeric id -> uuid and insert minimal columns
         try {
-            $sel = $pdo->prepare('SELECT job_id FROM ls_jobs_map WHERE id = :i');
-            $sel->execute([':i' => $jobId]);
-            $uuid = (string)($sel->fetchColumn() ?: '');
+            $uuid = self::legacyJobId($pdo, $jobId);
             $logId = self::uuid();
 
             // Try legacy with explicit log_id column first
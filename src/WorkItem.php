@@ -3,14 +3,20 @@ declare(strict_types=1);
 
 namespace Queue;
 
+/**
+ * Claimed job. Declared, typed properties only (no dynamic property table);
+ * the constructor initializes every slot in one call.
+ */
 final class WorkItem
 {
-    public int $id;
-    public string $type;
-    /** @var array<string,mixed> */
-    public array $payload;
-    public string $status;
-    public int $attempts;
-    public ?string $started_at;
-    public ?string $finished_at;
+    /** @param array<string,mixed> $payload */
+    public function __construct(
+        public int $id = 0,
+        public string $type = '',
+        public array $payload = [],
+        public string $status = 'pending',
+        public int $attempts = 0,
+        public ?string $started_at = null,
+        public ?string $finished_at = null,
+    ) {}
 }